@@ -0,0 +1,270 @@
+"""
+Process-pool execution for large enrichment batches.
+
+Requests are validated, looked up, enriched, scored (normalize_batch) and
+JSON-encoded inside worker processes, so that work runs off the server's
+event loop and threads. Results stream back in request order, one NDJSON
+line per request.
+
+Workers are long-lived processes, each fed over its own pipe.
+- They are started through forkserver (spawn where that is missing), never
+  forked from the server, which has threads by the time they start. Each
+  loads the dataset file and ingest log itself and gets the clock, scoring
+  and mock cache settings passed in.
+- Ingested rows reach workers as deltas: every chunk sent to a worker
+  carries the rows ingested since that worker last caught up. A worker the
+  capped ingest journal no longer reaches is re-seeded with every row
+  ingested since load. Only a reload (DatasetStore.generation) replaces
+  the workers.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from .dataset import DatasetStore
+from .enrich import (
+    clock_epoch,
+    clock_mode,
+    configure_clock,
+    configure_mock_cache,
+    match_index_scope,
+    mock_cache_stats,
+    normalize_batch,
+)
+from .models import EnrichRequest
+from .scoring import get_engine, set_engine
+
+DEFAULT_CHUNK_SIZE = 256
+
+_worker_store: Optional[DatasetStore] = None
+
+
+def _init_worker(
+    dataset_path: str,
+    compact: bool,
+    matching: bool,
+    log_path: Optional[str] = None,
+    shard_filter: Optional[Callable[[str], bool]] = None,
+) -> None:
+    global _worker_store
+    # Nothing is inherited: load our own copy (ingest log and shard slice included)
+    _worker_store = DatasetStore(
+        dataset_path, shard_filter=shard_filter, compact=compact, log_path=log_path, matching=matching
+    )
+    _worker_store.load()
+
+
+def enrich_chunk(store: DatasetStore, payloads: Sequence[Dict[str, Any]]) -> List[str]:
+    """Enrich payloads against `store`; one JSON line per payload, errors in place"""
+    lines: List[Optional[str]] = [None] * len(payloads)
+    items: List[Tuple[EnrichRequest, Optional[Dict[str, Any]]]] = []
+    positions: List[int] = []
+    for i, payload in enumerate(payloads):
+        try:
+            req = EnrichRequest.model_validate(payload)
+        except ValidationError as e:
+            detail = json.loads(e.json(include_url=False, include_context=False))
+            lines[i] = json.dumps({"error": "validation_error", "detail": detail})
+            continue
+        items.append((req, store.find(req.transaction_id, str(req.data.email))))
+        positions.append(i)
+
+    with match_index_scope(store.matches):
+        results = normalize_batch(items)
+    for i, result in zip(positions, results):
+        lines[i] = json.dumps(result)
+    return lines  # type: ignore[return-value]
+
+
+def _runtime_settings() -> Tuple[Any, ...]:
+    """Module-level settings a spawned worker does not inherit"""
+    return clock_mode(), clock_epoch(), get_engine(), mock_cache_stats()["maxsize"]
+
+
+def _worker_main(conn: Any, store_args: Tuple[Any, ...], settings: Tuple[Any, ...]) -> None:
+    mode, epoch, engine, mock_cache_size = settings
+    configure_clock(mode, epoch)
+    set_engine(engine)
+    configure_mock_cache(mock_cache_size)
+    _init_worker(*store_args)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        rows, payloads = message
+        if rows:
+            _worker_store.apply(rows)
+        conn.send(enrich_chunk(_worker_store, payloads))
+
+
+class _Worker:
+    def __init__(self, ctx: Any, generation: int, position: int, store_args: Tuple[Any, ...],
+                 settings: Tuple[Any, ...]):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, store_args, settings), daemon=True)
+        self.process.start()
+        child.close()
+        self.generation = generation
+        # Ingest journal position this worker has caught up to
+        self.position = position
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+
+class BatchExecutor:
+    """
+    Runs enrich_chunk over worker processes; workers <= 1 runs in-process.
+    """
+
+    def __init__(self, store: DatasetStore, workers: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.store = store
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self._current: List[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _spawn_workers(self) -> None:
+        """Replace the worker set (callers hold self._lock)"""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        # Workers still busy with an older generation are stopped when released
+        self.store.track_ingests()
+        generation = self.store.generation
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        store_args = (
+            self.store.dataset_path,
+            self.store.compact,
+            self.store.matches is not None,
+            self.store.log_path,
+            self.store.shard_filter,
+        )
+        settings = _runtime_settings()
+        # Workers load the files themselves, which misses rows ingested since load()
+        # without a log: start them at position 0 so they get every one (re-applying
+        # logged rows is harmless)
+        self._current = [_Worker(ctx, generation, 0, store_args, settings) for _ in range(self.workers)]
+        for worker in self._current:
+            self._idle.put(worker)
+        self._generation = generation
+
+    def start(self) -> None:
+        """Start the workers now instead of on first use, so their dataset load happens at startup"""
+        if self.workers > 1:
+            with self._lock:
+                if self._generation is None:
+                    self._spawn_workers()
+
+    def _acquire(self, block: bool) -> Optional[_Worker]:
+        with self._lock:
+            if self._generation != self.store.generation:
+                self._spawn_workers()
+        try:
+            return self._idle.get(block=block)
+        except queue.Empty:
+            return None
+
+    def _release(self, worker: _Worker) -> None:
+        with self._lock:
+            current = worker in self._current
+        if current:
+            self._idle.put(worker)
+        else:
+            worker.stop()
+
+    def _discard(self, worker: _Worker) -> None:
+        """Drop a worker that failed; its slot is refilled by a respawn on next use"""
+        with self._lock:
+            if worker in self._current:
+                self._current.remove(worker)
+                self._generation = None
+        worker.stop()
+
+    def _send(self, worker: _Worker, chunk: Sequence[Dict[str, Any]]) -> None:
+        rows, worker.position = self.store.ingested_since(worker.position)
+        worker.conn.send((rows, list(chunk)))
+        with self._lock:
+            if self._current and all(w.generation == self.store.generation for w in self._current):
+                self.store.trim_ingests(min(w.position for w in self._current))
+
+    def _chunks(self, payloads: Sequence[Dict[str, Any]]) -> Iterator[Sequence[Dict[str, Any]]]:
+        for start in range(0, len(payloads), self.chunk_size):
+            yield payloads[start:start + self.chunk_size]
+
+    def run(self, payloads: Sequence[Dict[str, Any]]) -> Iterator[str]:
+        """Yield one JSON line per payload, in request order, as chunks complete"""
+        if self.workers <= 1 or len(payloads) <= self.chunk_size:
+            for chunk in self._chunks(payloads):
+                yield from enrich_chunk(self.store, chunk)
+            return
+
+        chunks = list(self._chunks(payloads))
+        busy: Dict[Any, Tuple[_Worker, int]] = {}
+        done: Dict[int, List[str]] = {}
+        sent = emitted = 0
+        try:
+            while emitted < len(chunks):
+                # Keep every free worker busy; block for one only when none is working for us
+                while sent < len(chunks):
+                    worker = self._acquire(block=not busy)
+                    if worker is None:
+                        break
+                    self._send(worker, chunks[sent])
+                    busy[worker.conn] = (worker, sent)
+                    sent += 1
+                for conn in wait(list(busy)):
+                    worker, index = busy.pop(conn)
+                    try:
+                        done[index] = conn.recv()
+                    except (EOFError, OSError):
+                        self._discard(worker)
+                        raise RuntimeError("batch worker exited unexpectedly")
+                    self._release(worker)
+                while emitted in done:
+                    yield from done.pop(emitted)
+                    emitted += 1
+        finally:
+            # Abandoned midway (client went away): collect outstanding chunks so workers are reusable
+            for conn, (worker, _) in busy.items():
+                try:
+                    conn.recv()
+                except (EOFError, OSError):
+                    self._discard(worker)
+                else:
+                    self._release(worker)
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._current = self._current, []
+            self._generation = None
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+
+# Values under these keys repeat across rows (currency, status, ...) and are
+# interned so every row shares one string object.
+INTERNED_FIELDS = frozenset({
+    "currency", "status", "decision", "channel", "merchant_id", "mcc", "country",
+    "network", "policy", "ip_country", "city", "state",
+})
+
+
+class Shape(tuple):
+    """Interned key tuple shared by every record with the same key set"""
+    __slots__ = ()
+
+
+# Key sets seen in ingested rows are registered so rows share one Shape each. The registry
+# is capped: once full, new key sets get their own unregistered Shape (still decodable, just
+# not shared) and are counted in shape_stats() so unexpected schema drift shows up in /health.
+DEFAULT_MAX_SHAPES = 4096
+
+_shapes: Dict[Tuple[str, ...], Shape] = {}
+_max_shapes = DEFAULT_MAX_SHAPES
+_unshared = 0
+
+
+def configure_shapes(maxsize: int) -> None:
+    """Register at most maxsize shared key shapes (already registered shapes are kept)"""
+    global _max_shapes
+    _max_shapes = maxsize
+
+
+def shape_stats() -> dict:
+    return {"size": len(_shapes), "maxsize": _max_shapes, "unshared": _unshared}
+
+
+def _shape(keys: Tuple[str, ...]) -> Shape:
+    global _unshared
+    shape = _shapes.get(keys)
+    if shape is None:
+        shape = Shape(sys.intern(k) for k in keys)
+        if len(_shapes) < _max_shapes:
+            _shapes[keys] = shape
+        else:
+            _unshared += 1
+    return shape
+
+
+def encode(value: Any, key: Optional[str] = None) -> Any:
+    """
+    Convert a JSON value into its compact form.
+    - dict -> tuple (shape, v1, v2, ...) with a shared Shape for the keys
+    - list -> list of encoded items
+    - str under INTERNED_FIELDS -> interned str
+    """
+    if isinstance(value, dict):
+        shape = _shape(tuple(value))
+        return (shape,) + tuple(encode(value[k], k) for k in shape)
+    if isinstance(value, list):
+        return [encode(v, key) for v in value]
+    if isinstance(value, str) and key in INTERNED_FIELDS:
+        return sys.intern(value)
+    return value
+
+
+def decode(value: Any) -> Any:
+    """Inverse of encode: rebuild plain dicts/lists for the response"""
+    if isinstance(value, tuple) and value and isinstance(value[0], Shape):
+        return {k: decode(v) for k, v in zip(value[0], value[1:])}
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    return value
+
+
+def lookup(value: Any, *path: str) -> Any:
+    """Read a nested field from a compact or plain row without decoding it"""
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, tuple) and value and isinstance(value[0], Shape):
+            try:
+                value = value[value[0].index(key) + 1]
+            except ValueError:
+                return None
+        else:
+            return None
+    return value
@@ -1,64 +1,669 @@
 from __future__ import annotations
 
+import base64
+import bisect
+import heapq
 import json
+import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import sys
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
 
+from .compact import encode, decode, lookup
+from .matching import MatchIndex
+
+logger = logging.getLogger(__name__)
+
+# Time index entries one export() page may examine before returning early
+DEFAULT_EXPORT_SCAN = 100_000
+# Ingest journal entries kept for batch workers before they are re-seeded instead
+DEFAULT_JOURNAL_LIMIT = 10_000
+
 
 def _safe_lower(s: Optional[str]) -> str:
     return (s or "").strip().lower()
 
 
+_CUSTOMER_STRINGS = ("first_name", "last_name", "email", "phone")
+
+
+def parse_transaction_time(t: Optional[str]) -> float:
+    try:
+        # Accept Z timestamps
+        return datetime.fromisoformat(t.replace("Z", "+00:00")).timestamp() if t else 0.0
+    except Exception:
+        return 0.0
+
+
+def _deep_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(v) for v in value)
+    return size
+
+
+def _sampled_dict_bytes(d: Dict[Any, Any], sample: int) -> int:
+    """Size of a dict and its keys and values, extrapolated from up to `sample` entries"""
+    count = len(d)
+    if not count:
+        return sys.getsizeof(d)
+    step = max(1, count // sample)
+    sampled = [item for i, item in enumerate(d.items()) if i % step == 0][:sample]
+    per_entry = sum(_deep_size(k) + _deep_size(v) for k, v in sampled) / len(sampled)
+    return int(sys.getsizeof(d) + per_entry * count)
+
+
+def _valid_customer(customer: Any) -> bool:
+    """customer is a dict whose indexed fields have the types the indexes expect"""
+    if not isinstance(customer, dict):
+        return False
+    if any(not isinstance(customer.get(k), (str, type(None))) for k in _CUSTOMER_STRINGS):
+        return False
+    addresses = customer.get("addresses")
+    if addresses is None:
+        return True
+    if not isinstance(addresses, dict) or not isinstance(addresses.get("billing"), (dict, type(None))):
+        return False
+    billing = addresses.get("billing") or {}
+    return all(isinstance(billing.get(k), (str, type(None))) for k in ("line1", "zip"))
+
+
+def _row_txid(row: Any) -> Optional[str]:
+    """transaction_id of a well-formed dataset row, else None"""
+    transaction = row.get("transaction") if isinstance(row, dict) else None
+    txid = transaction.get("transaction_id") if isinstance(transaction, dict) else None
+    if not txid or not isinstance(txid, str) or not _valid_customer(row.get("customer", {})):
+        return None
+    return txid
+
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    """Opaque export cursor for a (transaction_time, transaction_id) position"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        t, txid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor {cursor!r}") from e
+    if not isinstance(t, (int, float)) or not isinstance(txid, str):
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return float(t), txid
+
+
+def _iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Elements of the JSON array in `path`, parsed a chunk at a time rather than all at once"""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos = "", 0
+
+        def fill() -> bool:
+            """Append the next chunk (dropping what was consumed); False at end of file"""
+            nonlocal buf, pos
+            chunk = f.read(chunk_size)
+            buf, pos = buf[pos:] + chunk, 0
+            return bool(chunk)
+
+        def peek() -> str:
+            """Next non-whitespace character, left at buf[pos] ("" at end of file)"""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos].isspace():
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        if peek() != "[":
+            raise ValueError(f"{path}: not a JSON array")
+        pos += 1
+        if peek() == "]":
+            return
+        while True:
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+                # A number or literal may go on in the next chunk: parse it again with more input
+                if end == len(buf) and fill():
+                    continue
+                break
+            pos = end
+            yield value
+            separator = peek()
+            pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"{path}: malformed JSON array")
+            peek()
+
+
+class _EmailChanges:
+    """email_index edits for one email, collected over a batch of inserts"""
+
+    __slots__ = ("added", "dropped")
+
+    def __init__(self) -> None:
+        self.added: Dict[str, None] = {}
+        self.dropped: Set[str] = set()
+
+
+def _read_log(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-append
+                continue
+            if isinstance(row, dict):
+                yield row
+
+
 class DatasetStore:
     """
     Loads a small JSON dataset into memory.
     - Primary lookup: transaction_id
     - Secondary lookup: email -> most recent transaction_time
+    - Optional shard_filter: only rows whose transaction_id it accepts are loaded
+    - Optional compact mode: rows are held as interned tuple records (see
+      app.compact) and converted back to dicts only when returned
+    - Optional log_path: rows added with ingest() are appended there, replayed
+      by load() and periodically merged into the dataset file by compact_log()
+    - matches: name/phone/address index over customer records (app.matching),
+      unless matching=False
+
+    email_index lists are kept ordered by transaction_time (oldest first), so
+    the most recent row for an email is the last entry. Readers take no lock:
+    writers serialize on a lock and only publish fully-built rows.
+
+    The time index behind export() is a sorted list of (transaction_time,
+    transaction_id) built at load plus a smaller sorted list of rows ingested
+    since, folded into the first once it grows past an eighth of its size.
+    Entries left behind when a re-ingest changes a row's time are skipped on
+    read. load() builds everything off to the side and publishes it at once.
     """
 
-    def __init__(self, dataset_path: str):
+    def __init__(
+        self,
+        dataset_path: str,
+        shard_filter: Optional[Callable[[str], bool]] = None,
+        compact: bool = False,
+        log_path: Optional[str] = None,
+        matching: bool = True,
+    ):
         self.dataset_path = dataset_path
-        self.by_txid: Dict[str, Dict[str, Any]] = {}
+        self.shard_filter = shard_filter
+        self.compact = compact
+        self.log_path = log_path
+        self.by_txid: Dict[str, Any] = {}
         self.email_index: Dict[str, List[str]] = {}
+        self.matches: Optional[MatchIndex] = MatchIndex() if matching else None
+        self.pending_log_entries = 0
+        # Malformed rows (no transaction_id, wrong field types) left out by the last load()
+        self.skipped_rows = 0
+        # (by_txid, email_index, loaded time index, ingested time index), replaced as a unit
+        self._view: Tuple[Dict[str, Any], Dict[str, List[str]], List[Tuple[float, str]], List[Tuple[float, str]]] = (
+            self.by_txid, self.email_index, [], [])
+        self._new_times: List[Tuple[float, str]] = []
+        # Time index entries left behind by re-ingests that changed a row's time;
+        # skipped on read and purged by compact_log()
+        self._stale_times: Set[Tuple[float, str]] = set()
+        # Bumped on every load/ingest so holders of a snapshot can tell it changed
+        self.version = 0
+        # Bumped by load() only: ingests can be replayed onto a copy, a reload cannot
+        self.generation = 0
+        # transaction_ids ingested since load(), kept once track_ingests() is called
+        # (batch workers catch up from it); positions count from load(). The journal
+        # is dropped once it passes _journal_limit entries; followers behind it are
+        # re-seeded from _ingested, every distinct transaction_id ingested since load()
+        self._ingest_journal: Optional[List[str]] = None
+        self._journal_base = 0
+        self._journal_limit = DEFAULT_JOURNAL_LIMIT
+        self._ingested: Dict[str, None] = {}
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def compacting_path(self) -> Optional[str]:
+        return self.log_path + ".compacting" if self.log_path else None
 
     def load(self) -> None:
-        self.by_txid = {}
-        self.email_index = {}
+        """(Re)load the dataset file and ingest log; readers see the old rows until the new ones are complete"""
+        staged = DatasetStore(
+            self.dataset_path, self.shard_filter, self.compact, self.log_path, matching=self.matches is not None)
+        staged._build()
+        with self._write_lock:
+            self.by_txid = staged.by_txid
+            self.email_index = staged.email_index
+            self._view = staged._view
+            self.pending_log_entries = staged.pending_log_entries
+            self.skipped_rows = staged.skipped_rows
+            self._stale_times = staged._stale_times
+            if self.matches is not None and staged.matches is not None:
+                self.matches.replace(staged.matches)
+            self.version += 1
+            self.generation += 1
+            if self._ingest_journal is not None:
+                self._ingest_journal, self._journal_base, self._ingested = [], 0, {}
 
-        if not os.path.exists(self.dataset_path):
-            return
+    def _build(self) -> None:
+        if os.path.exists(self.dataset_path):
+            with open(self.dataset_path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+
+            for row in rows:
+                if not self.add(row) and not _row_txid(row):
+                    self.skipped_rows += 1
+
+            # Oldest first; among equal times the earliest loaded row sorts last
+            for txids in self.email_index.values():
+                txids.reverse()
+                txids.sort(key=self._time)
+        times = sorted((self._time(txid), txid) for txid in self.by_txid)
+        self._view = (self.by_txid, self.email_index, times, [])
+
+        if self.log_path:
+            # A leftover .compacting file means compaction was interrupted; it is
+            # older than the live log, so replay it first
+            pending: Dict[str, _EmailChanges] = {}
+            for path in (self.compacting_path, self.log_path):
+                for row in _read_log(path):
+                    if self._insert(row, pending):
+                        self.pending_log_entries += 1
+                    elif not _row_txid(row):
+                        self.skipped_rows += 1
+            self._publish_emails(pending)
+            self._publish_times()
+        if self.skipped_rows:
+            logger.warning("%s: skipped %d malformed rows", self.dataset_path, self.skipped_rows)
+
+    def _accepts(self, row: Dict[str, Any]) -> Optional[str]:
+        txid = _row_txid(row)
+        if not txid:
+            return None
+        if self.shard_filter is not None and not self.shard_filter(txid):
+            return None
+        return txid
+
+    @staticmethod
+    def _time_in(by_txid: Dict[str, Any], txid: str) -> float:
+        return parse_transaction_time(lookup(by_txid.get(txid), "transaction", "transaction_time"))
 
-        with open(self.dataset_path, "r", encoding="utf-8") as f:
-            rows = json.load(f)
+    def _time(self, txid: str) -> float:
+        return self._time_in(self.by_txid, txid)
 
+    def add(self, row: Dict[str, Any]) -> bool:
+        """Index one row during load; returns False if it has no transaction_id or belongs to another shard"""
+        txid = self._accepts(row)
+        if not txid:
+            return False
+        previous = self.by_txid.get(txid)
+        if previous is not None and self.matches is not None:
+            # A repeated transaction_id in the file: the later row wins, as in by_txid
+            self.matches.remove(self._row(previous).get("customer"))
+        self.by_txid[txid] = encode(row) if self.compact else row
+        if self.matches is not None:
+            self.matches.add(row.get("customer"))
+
+        email = _safe_lower((row.get("customer") or {}).get("email"))
+        if email:
+            self.email_index.setdefault(email, []).append(txid)
+        return True
+
+    def _insert(self, row: Dict[str, Any], pending: Dict[str, "_EmailChanges"]) -> bool:
+        """
+        Index one row into the live store. Its email_index change is recorded
+        in `pending` and applied by _publish_emails, so a batch copies each
+        email's list once rather than once per row.
+        """
+        txid = self._accepts(row)
+        if not txid:
+            return False
+
+        t = parse_transaction_time(row.get("transaction", {}).get("transaction_time"))
+        previous = self.by_txid.get(txid)
+        old_t = None
+        if previous is not None:
+            old_t = parse_transaction_time(lookup(previous, "transaction", "transaction_time"))
+        if old_t != t:
+            self._new_times.append((t, txid))
+            self._stale_times.discard((t, txid))
+            if old_t is not None:
+                self._stale_times.add((old_t, txid))
+        if previous is not None:
+            if self.matches is not None:
+                self.matches.remove(self._row(previous).get("customer"))
+            old_email = _safe_lower(lookup(previous, "customer", "email"))
+            if old_email:
+                changes = pending.setdefault(old_email, _EmailChanges())
+                changes.dropped.add(txid)
+                changes.added.pop(txid, None)
+
+        self.by_txid[txid] = encode(row) if self.compact else row
+        if self.matches is not None:
+            self.matches.add(row.get("customer"))
+
+        email = _safe_lower((row.get("customer") or {}).get("email"))
+        if email:
+            pending.setdefault(email, _EmailChanges()).added[txid] = None
+        return True
+
+    def _publish_emails(self, pending: Dict[str, "_EmailChanges"]) -> None:
+        """Replace each changed email_index list with a rebuilt copy (readers never see a half-updated list)"""
+        for email, changes in pending.items():
+            current = self.email_index.get(email, [])
+            # Newest additions first, then the existing rows, and a stable sort by time:
+            # among equal times an earlier row keeps sorting last, as at load
+            txids = list(reversed(changes.added))
+            txids.extend(t for t in current if t not in changes.dropped)
+            txids.sort(key=self._time)
+            if txids:
+                self.email_index[email] = txids
+            else:
+                self.email_index.pop(email, None)
+
+    def ingest(self, row: Dict[str, Any]) -> bool:
+        """Add one row at runtime; see ingest_many"""
+        return self.ingest_many([row]) == 1
+
+    def ingest_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add rows at runtime (replacing rows with the same transaction_id) and
+        append them to the log. Returns how many rows were accepted.
+        """
+        # Rows are checked (and serialized) before anything is logged or indexed,
+        # so a rejected row leaves no trace in the log, the indexes or version
+        accepted = [row for row in rows if self._accepts(row)]
+        if not accepted:
+            return 0
+        lines = [json.dumps(row, separators=(",", ":")) + "\n" for row in accepted]
+
+        with self._write_lock:
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.pending_log_entries += len(accepted)
+            self._apply(accepted)
+            if self._ingest_journal is not None:
+                txids = [self._accepts(row) for row in accepted]
+                self._ingested.update(dict.fromkeys(txids))
+                self._ingest_journal.extend(txids)
+                if len(self._ingest_journal) > self._journal_limit:
+                    self._journal_base += len(self._ingest_journal)
+                    self._ingest_journal = []
+        return len(accepted)
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Index rows in memory only (no log): how a copy of this store catches up with ingests"""
+        accepted = [row for row in rows if self._accepts(row)]
+        with self._write_lock:
+            self._apply(accepted)
+        return len(accepted)
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        pending: Dict[str, _EmailChanges] = {}
         for row in rows:
-            txid = row.get("transaction", {}).get("transaction_id")
-            if not txid:
-                continue
-            self.by_txid[txid] = row
+            self._insert(row, pending)
+        self._publish_emails(pending)
+        self._publish_times()
+        self.version += 1
 
-            email = _safe_lower(row.get("customer", {}).get("email"))
-            if email:
-                self.email_index.setdefault(email, []).append(txid)
+    def track_ingests(self, limit: int = DEFAULT_JOURNAL_LIMIT) -> int:
+        """Start keeping the ingest journal if needed; returns the current journal position"""
+        with self._write_lock:
+            self._journal_limit = limit
+            if self._ingest_journal is None:
+                self._ingest_journal = []
+            return self._journal_base + len(self._ingest_journal)
 
-    def find(self, transaction_id: str, email: str) -> Optional[Dict[str, Any]]:
-        if transaction_id in self.by_txid:
-            return self.by_txid[transaction_id]
+    def ingested_since(self, position: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Current rows for the transaction_ids ingested at or after `position`,
+        and the new position. A position the journal no longer reaches gets
+        every row ingested since load() instead (re-applying rows is harmless).
+        """
+        with self._write_lock:
+            journal = self._ingest_journal or []
+            if position < self._journal_base:
+                txids: Iterable[str] = list(self._ingested)
+            else:
+                txids = dict.fromkeys(journal[position - self._journal_base:])
+            end = self._journal_base + len(journal)
+            rows = [self._row(self.by_txid[t]) for t in txids if t in self.by_txid]
+        return rows, end
+
+    def trim_ingests(self, position: int) -> None:
+        """Forget journal entries before `position` (every follower has them)"""
+        with self._write_lock:
+            if self._ingest_journal is not None and position > self._journal_base:
+                self._ingest_journal = self._ingest_journal[position - self._journal_base:]
+                self._journal_base = position
+
+    def _publish_times(self) -> None:
+        """Merge rows inserted since the last call into the time index (callers hold the write lock)"""
+        if not self._new_times:
+            return
+        self._new_times.sort()
+        _, _, loaded, ingested = self._view
+        ingested = list(heapq.merge(ingested, self._new_times))
+        if len(ingested) > max(4096, len(loaded) // 8):
+            loaded, ingested = list(heapq.merge(loaded, ingested)), []
+        self._view = (self.by_txid, self.email_index, loaded, ingested)
+        self._new_times = []
+
+    def compact_log(self) -> int:
+        """
+        Merge logged rows into the dataset file. The live log is renamed first,
+        so ingest keeps appending to a fresh log while the merge runs.
+        Returns how many logged rows were merged.
+        """
+        if not self.log_path:
+            return 0
+
+        with self._compact_lock:
+            with self._write_lock:
+                if not os.path.exists(self.compacting_path):
+                    if not os.path.exists(self.log_path):
+                        return 0
+                    os.replace(self.log_path, self.compacting_path)
+                self.pending_log_entries = 0
+
+            # Malformed lines (written before rows were validated) are dropped
+            logged: Dict[str, Dict[str, Any]] = {}
+            for row in _read_log(self.compacting_path):
+                txid = _row_txid(row)
+                if txid:
+                    logged[txid] = row
+            merged = len(logged)
+
+            # Stream the base file through, swapping in logged rows by transaction_id,
+            # so the merge never holds the whole dataset in memory a second time
+            tmp_path = self.dataset_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                first = True
+
+                def emit(row: Any) -> None:
+                    nonlocal first
+                    f.write("[\n" if first else ",\n")
+                    f.write(json.dumps(row, separators=(",", ":")))
+                    first = False
 
+                written: Set[str] = set()
+                if os.path.exists(self.dataset_path):
+                    for row in _iter_json_array(self.dataset_path):
+                        txid = _row_txid(row)
+                        if txid in logged:
+                            if txid in written:
+                                continue
+                            written.add(txid)
+                            row = logged[txid]
+                        emit(row)
+                # Rows new to the dataset go last, in log order
+                for txid, row in logged.items():
+                    if txid not in written:
+                        emit(row)
+                if first:
+                    f.write("[")
+                f.write("\n]\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.dataset_path)
+            os.remove(self.compacting_path)
+        self._purge_stale_times()
+        return merged
+
+    def _purge_stale_times(self) -> None:
+        """Drop time index entries re-ingests left behind (readers keep the lists they hold)"""
+        with self._write_lock:
+            if not self._stale_times:
+                return
+            stale = self._stale_times
+            by_txid, email_index, loaded, ingested = self._view
+            self._view = (by_txid, email_index, [k for k in loaded if k not in stale],
+                          [k for k in ingested if k not in stale])
+            self._stale_times = set()
+
+    def start_compactor(self, interval: float, min_entries: int = 1) -> None:
+        """Compact in a daemon thread every `interval` seconds once `min_entries` rows are logged"""
+        if self._compactor is not None or not self.log_path:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                if self.pending_log_entries >= min_entries:
+                    self.compact_log()
+
+        self._compactor = threading.Thread(target=run, name="dataset-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self) -> None:
+        if self._compactor is None:
+            return
+        self._stop.set()
+        self._compactor.join()
+        self._compactor = None
+
+    def estimate_bytes(self, sample: int = 256) -> int:
+        """
+        Approximate memory held by rows and indexes, extrapolated from a sample
+        of rows (shared/interned objects are counted per row, so this errs high)
+        """
+        count = len(self.by_txid)
+        if not count:
+            return sys.getsizeof(self.by_txid) + sys.getsizeof(self.email_index)
+        step = max(1, count // sample)
+        sampled = [row for i, row in enumerate(self.by_txid.values()) if i % step == 0][:sample]
+        per_row = sum(_deep_size(row) for row in sampled) / len(sampled)
+        index = sys.getsizeof(self.by_txid) + sys.getsizeof(self.email_index)
+        index += count * 2 * sys.getsizeof("tx_000000000")
+        index += count * (sys.getsizeof((0.0, "")) + sys.getsizeof(0.0) + 8)
+        if self.matches is not None:
+            m = self.matches
+            index += sum(_sampled_dict_bytes(d, sample) for d in (m.by_email, m.by_phone, m.by_address, m._refs))
+        return int(per_row * count + index)
+
+    def latest_for_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Most recent row for an email, by transaction_time"""
         e = _safe_lower(email)
-        txids = self.email_index.get(e, [])
-        if not txids:
+        for txid in reversed(self.email_index.get(e, [])):
+            stored = self.by_txid.get(txid)
+            if stored is not None:
+                return self._row(stored)
+        return None
+
+    def _row(self, stored: Any) -> Dict[str, Any]:
+        return decode(stored) if self.compact else stored
+
+    def get(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        stored = self.by_txid.get(transaction_id)
+        return self._row(stored) if stored is not None else None
+
+    def find(self, transaction_id: str, email: str, email_fallback: bool = True) -> Optional[Dict[str, Any]]:
+        if transaction_id in self.by_txid:
+            return self.get(transaction_id)
+        if not email_fallback:
             return None
+        return self.latest_for_email(email)
 
-        def parse_time(row: Dict[str, Any]) -> float:
-            t = row.get("transaction", {}).get("transaction_time")
-            try:
-                # Accept Z timestamps
-                return datetime.fromisoformat(t.replace("Z", "+00:00")).timestamp() if t else 0.0
-            except Exception:
-                return 0.0
-
-        rows = [self.by_txid[txid] for txid in txids if txid in self.by_txid]
-        rows.sort(key=parse_time, reverse=True)
-        return rows[0] if rows else None
+    def export(
+        self,
+        after: Optional[Tuple[float, str]] = None,
+        limit: int = 1000,
+        email: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        merchant_id: Optional[str] = None,
+        scan_limit: int = DEFAULT_EXPORT_SCAN,
+    ) -> Tuple[Iterator[Dict[str, Any]], Optional[Tuple[float, str]]]:
+        """
+        One page of rows ordered by (transaction_time, transaction_id), starting
+        after the `after` position. Returns the rows (decoded lazily) and the
+        position to resume from, or None once the rows run out. Memory is
+        bounded by `limit`, not by the dataset size, and work by `scan_limit`
+        index entries: a selective merchant_id filter can return a short (even
+        empty) page with a position to resume the scan from.
+        """
+        by_txid, email_index, loaded, ingested = self._view
+        # Start at `since` inclusive or just past the cursor, whichever is later
+        lo, exclusive = ((since, ""), False) if since is not None else (None, False)
+        if after is not None and (lo is None or after >= lo):
+            lo, exclusive = after, True
+
+        if email:
+            keys = sorted((self._time_in(by_txid, txid), txid) for txid in email_index.get(_safe_lower(email), []))
+            sources = [keys]
+        else:
+            sources = [loaded, ingested]
+
+        def tail(entries: List[Tuple[float, str]]) -> Iterator[Tuple[float, str]]:
+            if lo is None:
+                start = 0
+            else:
+                start = (bisect.bisect_right if exclusive else bisect.bisect_left)(entries, lo)
+            return (entries[i] for i in range(start, len(entries)))
+
+        page: List[Tuple[Tuple[float, str], Any]] = []
+        previous = None
+        scanned = 0
+        for key in heapq.merge(*(tail(entries) for entries in sources)):
+            if until is not None and key[0] > until:
+                break
+            if scanned == scan_limit:
+                # Out of budget for this page: resume after the last entry looked at
+                return (self._row(stored) for _, stored in page), previous
+            scanned += 1
+            if key == previous:
+                continue
+            previous = key
+            stored = by_txid.get(key[1])
+            if stored is None or self._time_in(by_txid, key[1]) != key[0]:
+                continue
+            if merchant_id is not None and lookup(stored, "transaction", "merchant", "merchant_id") != merchant_id:
+                continue
+            page.append((key, stored))
+            if len(page) == limit:
+                break
+
+        next_key = page[-1][0] if len(page) == limit else None
+        return (self._row(stored) for _, stored in page), next_key
@@ -0,0 +1,54 @@
+"""
+Request deadlines carried in the X-Deadline-Ms header: the caller's remaining
+time budget in milliseconds when the request was sent. A relative budget
+avoids depending on synchronized clocks; each hop subtracts the time it spent
+before passing the header on.
+"""
+from __future__ import annotations
+
+import json
+import math
+import time
+from typing import Any, Dict, Mapping, Optional
+
+DEADLINE_HEADER = "x-deadline-ms"
+
+
+def parse_deadline(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """time.monotonic() deadline for a request's X-Deadline-Ms header, or None if absent, invalid or not finite"""
+    value = headers.get(DEADLINE_HEADER)
+    if value is None:
+        return None
+    try:
+        budget_ms = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(budget_ms):
+        return None
+    return (time.monotonic() if now is None else now) + budget_ms / 1000.0
+
+
+def remaining_ms(deadline: float) -> int:
+    return max(0, int((deadline - time.monotonic()) * 1000))
+
+
+class DeadlineMiddleware:
+    """ASGI middleware answering 504 without doing any work when the caller's budget is already spent"""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+            deadline = parse_deadline(headers)
+            if deadline is not None and deadline <= time.monotonic():
+                body = json.dumps({"detail": "Deadline exceeded"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
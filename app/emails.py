@@ -0,0 +1,46 @@
+"""
+CachedEmailStr: EmailStr with an optional LRU cache in front of
+email-validator, which dominates validation time for small payloads.
+Kept free of web framework imports so app.models stays importable on its own.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from pydantic.networks import validate_email
+from pydantic_core import core_schema
+
+_validate_email: Callable[[str], Any] = validate_email
+
+
+def configure_email_cache(maxsize: int) -> None:
+    """Cache up to maxsize email validation results (0 validates every time)"""
+    global _validate_email
+    _validate_email = lru_cache(maxsize=maxsize)(validate_email) if maxsize > 0 else validate_email
+
+
+def email_cache_stats() -> Optional[dict]:
+    info = getattr(_validate_email, "cache_info", None)
+    if info is None:
+        return None
+    i = info()
+    return {"size": i.currsize, "maxsize": i.maxsize, "hits": i.hits, "misses": i.misses}
+
+
+def _normalize_email(value: str) -> str:
+    return _validate_email(value)[1]
+
+
+class CachedEmailStr(str):
+    """EmailStr whose normalization goes through the configurable email cache"""
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_after_validator_function(_normalize_email, core_schema.str_schema())
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: core_schema.CoreSchema, handler: Any) -> dict:
+        field_schema = handler(schema)
+        field_schema.update(type="string", format="email")
+        return field_schema
@@ -2,12 +2,149 @@ from __future__ import annotations
 
 import hashlib
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from .matching import MatchIndex
+from .scoring import get_engine
 from .models import EnrichRequest, EkataRequest, EmailageRequest, EkataResponse, EkataResponseData, EkataPayload, EmailageResponse, EmailagePayload
 
 
+CLOCK_MODES = ("wall", "transaction", "fixed")
+DEFAULT_CLOCK_EPOCH = "2026-01-01T00:00:00Z"
+
+_clock_mode = "wall"
+_clock_epoch = datetime.fromisoformat(DEFAULT_CLOCK_EPOCH.replace("Z", "+00:00"))
+
+
+def configure_clock(mode: str = "wall", epoch: Optional[str] = None) -> None:
+    """
+    Select the reference time used for relative mock dates.
+    - wall: current UTC time (default)
+    - transaction: the request's transaction_time, falling back to the epoch
+      for requests that carry no transaction_time
+    - fixed: the configured epoch
+    """
+    global _clock_mode, _clock_epoch
+    if mode not in CLOCK_MODES:
+        raise ValueError(f"Unknown clock mode {mode!r}, expected one of {', '.join(CLOCK_MODES)}")
+    epoch_dt = datetime.fromisoformat((epoch or DEFAULT_CLOCK_EPOCH).replace("Z", "+00:00"))
+    if epoch_dt.tzinfo is None:
+        epoch_dt = epoch_dt.replace(tzinfo=timezone.utc)
+    _clock_mode = mode
+    _clock_epoch = epoch_dt.astimezone(timezone.utc)
+
+
+def clock_mode() -> str:
+    return _clock_mode
+
+
+def clock_epoch() -> str:
+    return _clock_epoch.isoformat()
+
+
+def _reference_now(transaction_time: Optional[datetime] = None) -> datetime:
+    """Anchor for relative dates, according to the configured clock mode"""
+    if _clock_mode == "transaction" and transaction_time is not None:
+        if transaction_time.tzinfo is None:
+            transaction_time = transaction_time.replace(tzinfo=timezone.utc)
+        now = transaction_time.astimezone(timezone.utc)
+    elif _clock_mode == "wall":
+        now = datetime.now(timezone.utc)
+    else:
+        now = _clock_epoch
+    return now.replace(microsecond=0)
+
+
+_match_index: Optional[MatchIndex] = None
+_UNSET = object()
+# Per-request override (e.g. the selected tenant's index); _UNSET uses _match_index
+_scoped_match_index: ContextVar[Any] = ContextVar("scoped_match_index", default=_UNSET)
+
+
+def configure_matching(index: Optional[MatchIndex]) -> None:
+    """Use dataset customer records for Ekata match flags (None restores pure mocks)"""
+    global _match_index
+    _match_index = index
+
+
+@contextmanager
+def match_index_scope(index: Optional[MatchIndex]) -> Iterator[None]:
+    """Use `index` instead of the configured one for enrichment in this context"""
+    token = _scoped_match_index.set(index)
+    try:
+        yield
+    finally:
+        _scoped_match_index.reset(token)
+
+
+def _match(first_name: str, last_name: str, email: str, phone: Optional[str],
+           line1: Optional[str] = None, zip_code: Optional[str] = None) -> Dict[str, Any]:
+    index = _scoped_match_index.get()
+    if index is _UNSET:
+        index = _match_index
+    if index is None:
+        return {}
+    found = index.match(first_name, last_name, email, phone, line1, zip_code)
+    return {k: v for k, v in found.items() if v is not None}
+
+
+class _MockCache:
+    """
+    Bounded LRU of built mock payloads, keyed by everything a builder reads.
+    Cached dicts are shared between responses and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Tuple[Any, ...], build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        if self.maxsize <= 0:
+            return build()
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+_mock_cache = _MockCache()
+
+
+def configure_mock_cache(maxsize: int) -> None:
+    """Memoize mock transaction/ThreatMetrix/Emailage payloads (0 disables)"""
+    _mock_cache.maxsize = maxsize
+    _mock_cache.clear()
+
+
+def mock_cache_stats() -> Dict[str, int]:
+    return _mock_cache.stats()
+
+
 def _h(seed: str) -> int:
     digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()
     return int(digest[:12], 16)
@@ -39,8 +176,14 @@ def _get_seed(req: EnrichRequest) -> str:
 def build_mock_emailage(req: EnrichRequest) -> Dict[str, Any]:
     """Build mock Emailage response"""
     seed = _get_seed(req)
-    now = datetime.now(timezone.utc).replace(microsecond=0)
+    now = _reference_now(req.transaction_time)
+    if _clock_mode == "wall":
+        # Dates move with the wall clock, so there is nothing stable to cache
+        return _build_mock_emailage(seed, now)
+    return _mock_cache.get_or_build(("emailage", seed, now), lambda: _build_mock_emailage(seed, now))
+
 
+def _build_mock_emailage(seed: str, now: datetime) -> Dict[str, Any]:
     first_seen_days_ago = 30 + (_h(seed + "|first_seen") % 2000)
     last_seen_days_ago = _h(seed + "|last_seen") % 90
 
@@ -62,6 +205,10 @@ def build_mock_emailage(req: EnrichRequest) -> Dict[str, Any]:
 def build_mock_threatmetrix(req: EnrichRequest) -> Dict[str, Any]:
     """Build mock ThreatMetrix response"""
     seed = _get_seed(req)
+    return _mock_cache.get_or_build(("threatmetrix", seed), lambda: _build_mock_threatmetrix(seed))
+
+
+def _build_mock_threatmetrix(seed: str) -> Dict[str, Any]:
     tm_risk = _score_0_100(seed + "|threatmetrix")
 
     return {
@@ -78,13 +225,23 @@ def build_mock_ekata(req: EnrichRequest) -> Dict[str, Any]:
     """Build mock Ekata response"""
     seed = _get_seed(req)
     ekata_conf = _score_0_100(seed + "|ekata")
+    billing = req.data.billing_address
+    found = _match(
+        req.data.first_name, req.data.last_name, str(req.data.email), req.data.phone,
+        billing.line1 if billing else None, (billing.zip if billing else None) or req.data.zip,
+    )
 
-    return {
+    # Flags come from dataset customer records when there is a candidate,
+    # otherwise from the deterministic mock
+    ekata = {
         "identity_confidence": ekata_conf,
-        "phone_to_name_match": _bool(seed + "|phone_name", 72),
-        "address_to_name_match": _bool(seed + "|addr_name", 66),
-        "email_to_name_match": _bool(seed + "|email_name", 62),
+        "phone_to_name_match": found.get("phone_to_name_match", _bool(seed + "|phone_name", 72)),
+        "address_to_name_match": found.get("address_to_name_match", _bool(seed + "|addr_name", 66)),
+        "email_to_name_match": found.get("email_to_name_match", _bool(seed + "|email_name", 62)),
     }
+    if "name_similarity" in found:
+        ekata["name_similarity"] = found["name_similarity"]
+    return ekata
 
 
 def build_mock_external_services(req: EnrichRequest) -> Dict[str, Any]:
@@ -97,6 +254,16 @@ def build_mock_external_services(req: EnrichRequest) -> Dict[str, Any]:
 
 
 def build_mock_transaction(req: EnrichRequest) -> Dict[str, Any]:
+    card = req.payment.card if req.payment else None
+    key = (
+        "transaction", req.transaction_id, str(req.data.email), req.data.ip, req.transaction_time,
+        req.payment.amount if req.payment else None, req.payment.currency if req.payment else None,
+        (card.bin, card.last4, card.network) if card else None, req.channel, req.merchant_id,
+    )
+    return _mock_cache.get_or_build(key, lambda: _build_mock_transaction(req))
+
+
+def _build_mock_transaction(req: EnrichRequest) -> Dict[str, Any]:
     seed = f"{req.transaction_id}|{req.data.email}"
 
     status = _pick(seed + "|status", ["Completed", "Declined", "Review", "Pending"])
@@ -134,7 +301,8 @@ def build_mock_transaction(req: EnrichRequest) -> Dict[str, Any]:
     }
 
 
-def normalize_response(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+def _build_payload(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]) -> Tuple[bool, Dict[str, Any]]:
+    """Transaction payload without the risk summary"""
     if dataset_row:
         base = json.loads(json.dumps(dataset_row))  # deep copy
         hit = True
@@ -173,22 +341,10 @@ def normalize_response(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]
     if missing_any:
         base["external_services"].update(build_mock_external_services(req))
 
-    # Risk summary
-    email_score = int(base["external_services"]["emailage"].get("score", 0))
-    tm_score = int(base["external_services"]["threatmetrix"].get("risk_score", 0))
-    blended = int(round((0.55 * tm_score) + (0.45 * email_score)))
-
-    base["risk"] = {
-        "blended_score": blended,
-        "reason_codes": [
-            "IP_PROXY" if base.get("transaction", {}).get("network", {}).get("ip_proxy") else None,
-            "DISPOSABLE_EMAIL" if base["external_services"]["emailage"].get("disposable") else None,
-            "BOT_DETECTED" if base["external_services"]["threatmetrix"].get("bot_detected") else None,
-        ],
-        "recommended_action": "REVIEW" if blended >= 60 else "ALLOW",
-    }
-    base["risk"]["reason_codes"] = [x for x in base["risk"]["reason_codes"] if x]
+    return hit, base
 
+
+def _envelope(req: EnrichRequest, hit: bool, base: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "request_id": req.request_id,
         "transaction_id": req.transaction_id,
@@ -208,6 +364,23 @@ def normalize_response(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]
     }
 
 
+def normalize_response(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    hit, base = _build_payload(req, dataset_row)
+    base["risk"] = get_engine().score(base)
+    return _envelope(req, hit, base)
+
+
+def normalize_batch(items: Sequence[Tuple[EnrichRequest, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """normalize_response for many (request, dataset_row) pairs, scored in one batch"""
+    built = [_build_payload(req, row) for req, row in items]
+    risks = get_engine().score_batch([base for _, base in built])
+    out = []
+    for (req, _), (hit, base), risk in zip(items, built, risks):
+        base["risk"] = risk
+        out.append(_envelope(req, hit, base))
+    return out
+
+
 def enrich_with_emailage(req: EnrichRequest, dataset_row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """Enrich transaction with Emailage data only"""
     if dataset_row and "external_services" in dataset_row and "emailage" in dataset_row["external_services"]:
@@ -301,9 +474,10 @@ def enrich_ekata_service(req: EkataRequest) -> EkataResponse:
     ip_risk = _score_0_100(seed + "|ip_risk")
     phone_risk = _score_0_100(seed + "|phone_risk")
 
-    # Generate match indicators
-    first_name_match = _bool(seed + "|fname_match", 75)
-    last_name_match = _bool(seed + "|lname_match", 72)
+    # Match indicators from dataset customer records, falling back to the mock
+    found = _match(req.data.first_name, req.data.last_name, str(req.data.email), req.data.phone)
+    first_name_match = found.get("first_name_match", _bool(seed + "|fname_match", 75))
+    last_name_match = found.get("last_name_match", _bool(seed + "|lname_match", 72))
 
     # Create response data (echo back with modified field names)
     response_data = EkataResponseData(
@@ -325,7 +499,8 @@ def enrich_ekata_service(req: EkataRequest) -> EkataResponse:
         last_name_match=last_name_match,
         email_risk=email_risk,
         ip_risk=ip_risk,
-        phone_risk=phone_risk
+        phone_risk=phone_risk,
+        name_similarity=found.get("name_similarity")
     )
 
     return EkataResponse(
@@ -338,7 +513,7 @@ def enrich_ekata_service(req: EkataRequest) -> EkataResponse:
 def enrich_emailage_service(req: EmailageRequest) -> EmailageResponse:
     """Enrich with Emailage service using simplified request model"""
     seed = _get_simple_seed(req.request_id, str(req.data.email), req.data.ip or "0.0.0.0")
-    now = datetime.now(timezone.utc).replace(microsecond=0)
+    now = _reference_now()
 
     # Generate email history
     first_seen_days_ago = 30 + (_h(seed + "|first_seen") % 2000)
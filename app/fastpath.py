@@ -0,0 +1,96 @@
+"""
+Fast request validation for the hot JSON endpoints.
+
+FastValidationRoute validates the raw body bytes straight into the body model
+with pydantic-core (one pass: no intermediate dict from json.loads, no
+FastAPI dependency solving) and calls the endpoint with the model and its
+header parameters. Any body the fast path rejects, or any route it can't
+handle, goes through FastAPI's standard handler, so 422 responses are
+produced by the same code in both modes.
+"""
+from __future__ import annotations
+
+import asyncio
+import email.message
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    # Same rule FastAPI uses to decide whether to parse the body as JSON
+    if not content_type:
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+def _render(result: Any, status_code: int) -> Response:
+    if isinstance(result, Response):
+        return result
+    if isinstance(result, BaseModel):
+        # What jsonable_encoder does for a model
+        result = result.model_dump(mode="json", by_alias=True)
+    try:
+        return JSONResponse(result, status_code=status_code)
+    except TypeError:
+        return JSONResponse(jsonable_encoder(result), status_code=status_code)
+
+
+class FastValidationRoute(APIRoute):
+    """
+    APIRoute that validates a single pydantic body model from raw bytes.
+    Only routes whose parameters are that body plus headers take the fast
+    path; everything else (and every invalid body) uses the standard handler.
+    """
+
+    def _fast_body_model(self) -> Optional[type]:
+        d = self.dependant
+        if d.path_params or d.query_params or d.cookie_params or d.dependencies or self.response_field:
+            return None
+        if len(d.body_params) != 1 or self.body_field is None or self.body_field.field_info.embed:
+            return None
+        model = d.body_params[0].type_
+        return model if isinstance(model, type) and issubclass(model, BaseModel) else None
+
+    def get_route_handler(self) -> Callable:
+        standard = super().get_route_handler()
+        model = self._fast_body_model()
+        if model is None:
+            return standard
+
+        call = self.dependant.call
+        body_name = self.dependant.body_params[0].name
+        headers = [(p.name, p.alias, p.default) for p in self.dependant.header_params]
+        is_coroutine = asyncio.iscoroutinefunction(call)
+        status_code = self.status_code or 200
+
+        async def handler(request: Request) -> Response:
+            body = await request.body()
+            if not body or not _is_json(request.headers.get("content-type")):
+                return await standard(request)
+            try:
+                value = model.model_validate_json(body)
+            except ValidationError:
+                # request.body() is cached, so the standard handler re-reads it
+                # and builds the usual RequestValidationError
+                return await standard(request)
+            kwargs = {body_name: value}
+            for name, alias, default in headers:
+                kwargs[name] = request.headers.get(alias, default)
+            if is_coroutine:
+                result = await call(**kwargs)
+            else:
+                result = await run_in_threadpool(call, **kwargs)
+            return _render(result, status_code)
+
+        return handler
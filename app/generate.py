@@ -0,0 +1,281 @@
+"""
+Synthetic dataset generator for scale testing.
+
+    python -m app.generate --rows 1000000 --output data/synthetic.json
+    python -m app.generate --rows 100000 --format ndjson --zipf 1.2 --output rows.ndjson
+    python -m app.generate --rows 100000 --format requests --output replay.ndjson
+
+Rows use the same distributions as the mock builders in app.enrich and are a
+pure function of (--seed, row number), so output is identical for any
+--workers count. Customer identity (name, phone, address) is derived from the
+email, and emails are drawn from a pool of --emails addresses with Zipf(--zipf)
+popularity so heavy repeat customers exist. --format requests writes the
+matching EnrichRequest payloads, one per line, for replay.
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import multiprocessing
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from .enrich import (
+    _h,
+    _pick,
+    _bool,
+    build_mock_external_services,
+    build_mock_transaction,
+    clock_epoch,
+    clock_mode,
+    configure_clock,
+    match_index_scope,
+)
+from .models import Card, EnrichRequest, Payment, RequestData
+
+FORMATS = ("json", "ndjson", "requests")
+DEFAULT_START = "2025-01-01T00:00:00Z"
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "Vishnu", "Priya", "Wei", "Mei", "Carlos", "Sofia", "Ahmed", "Fatima", "Olga", "Ivan"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Reddy", "Patel",
+              "Wang", "Li", "Hernandez", "Lopez", "Khan", "Ali", "Ivanova", "Petrov", "Nguyen", "Kim"]
+DOMAINS = ["example.com", "mail.com", "test.com", "inbox.net", "post.org"]
+CITIES = [("Seattle", "WA", "981"), ("Austin", "TX", "787"), ("Boston", "MA", "021"), ("Denver", "CO", "802"),
+          ("Miami", "FL", "331"), ("Chicago", "IL", "606"), ("Phoenix", "AZ", "850"), ("Portland", "OR", "972")]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St", "Lake Blvd", "Hill Ct"]
+NETWORKS = [("VISA", "4"), ("MASTERCARD", "5"), ("AMEX", "3"), ("DISCOVER", "6")]
+CURRENCIES = ["USD", "USD", "USD", "USD", "CAD", "EUR", "GBP"]
+
+
+class GeneratorConfig:
+    """Generation parameters; the email CDF is built once per process"""
+
+    def __init__(self, seed: str, rows: int, emails: int, zipf: float, start: str, span_days: int):
+        self.seed = seed
+        self.rows = rows
+        self.emails = max(1, emails)
+        self.zipf = zipf
+        self.start = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        self.span_seconds = max(1, span_days) * 86400
+        self._cdf: Optional[List[float]] = None
+
+    def email_cdf(self) -> List[float]:
+        if self._cdf is None:
+            weights = [1.0 / ((k + 1) ** self.zipf) for k in range(self.emails)]
+            total = sum(weights)
+            acc, cdf = 0.0, []
+            for w in weights:
+                acc += w
+                cdf.append(acc / total)
+            self._cdf = cdf
+        return self._cdf
+
+    def params(self) -> Tuple[str, int, int, float, str, int]:
+        return (self.seed, self.rows, self.emails, self.zipf, self.start.isoformat(), self.span_seconds // 86400)
+
+
+def _unit(seed: str) -> float:
+    # _h yields 48 bits
+    return _h(seed) / float(1 << 48)
+
+
+def _email_rank(cfg: GeneratorConfig, i: int) -> int:
+    u = _unit(f"{cfg.seed}|{i}|email")
+    return min(bisect.bisect_left(cfg.email_cdf(), u), cfg.emails - 1)
+
+
+def _customer(cfg: GeneratorConfig, rank: int) -> Dict[str, Any]:
+    s = f"{cfg.seed}|customer|{rank}"
+    first = _pick(s + "|first", FIRST_NAMES)
+    last = _pick(s + "|last", LAST_NAMES)
+    city, state, zip_prefix = CITIES[_h(s + "|city") % len(CITIES)]
+    return {
+        "first_name": first,
+        "last_name": last,
+        "email": f"{first.lower()}.{last.lower()}.{rank}@{_pick(s + '|domain', DOMAINS)}",
+        "phone": f"+1-{200 + _h(s + '|area') % 800}-{_h(s + '|phone') % 10_000_000:07d}",
+        "addresses": {
+            "billing": {
+                "line1": f"{1 + _h(s + '|num') % 9999} {_pick(s + '|street', STREETS)}",
+                "city": city,
+                "state": state,
+                "zip": f"{zip_prefix}{_h(s + '|zip') % 100:02d}",
+                "country": "US",
+            }
+        },
+    }
+
+
+def _request(cfg: GeneratorConfig, i: int) -> Tuple[EnrichRequest, Dict[str, Any]]:
+    """Unvalidated EnrichRequest for row i plus its customer record"""
+    s = f"{cfg.seed}|{i}"
+    customer = _customer(cfg, _email_rank(cfg, i))
+    billing = customer["addresses"]["billing"]
+    network, prefix = NETWORKS[_h(s + "|network") % len(NETWORKS)]
+    when = cfg.start + timedelta(seconds=_h(s + "|time") % cfg.span_seconds)
+
+    card = Card.model_construct(
+        bin=f"{prefix}{_h(s + '|bin') % 100000:05d}",
+        last4=f"{_h(s + '|last4') % 10000:04d}",
+        network=network,
+    )
+    payment = Payment.model_construct(
+        amount=round((_h(s + "|amount") % 49999) / 100.0 + 1.0, 2),
+        currency=_pick(s + "|currency", CURRENCIES),
+        card=card,
+    )
+    data = RequestData.model_construct(
+        first_name=customer["first_name"],
+        last_name=customer["last_name"],
+        email=customer["email"],
+        ip=f"{1 + _h(s + '|ip1') % 223}.{_h(s + '|ip2') % 256}.{_h(s + '|ip3') % 256}.{1 + _h(s + '|ip4') % 254}",
+        phone=customer["phone"],
+        city=billing["city"],
+        state=billing["state"],
+        zip=billing["zip"],
+        billing_address=None,
+        shipping_address=None,
+        device=None,
+    )
+    req = EnrichRequest.model_construct(
+        request_id=f"req_{cfg.seed}_{i}",
+        transaction_id=f"tx_{cfg.seed}_{i:09d}",
+        transaction_time=when,
+        data=data,
+        payment=payment,
+        customer_id=None,
+        merchant_id=None,
+        channel=None,
+    )
+    return req, customer
+
+
+def generate_row(cfg: GeneratorConfig, i: int) -> Dict[str, Any]:
+    """Dataset row i (transaction, customer, external_services, features)"""
+    req, customer = _request(cfg, i)
+    s = f"{cfg.seed}|{i}"
+    return {
+        "transaction": build_mock_transaction(req),
+        "customer": customer,
+        "external_services": build_mock_external_services(req),
+        "features": {
+            "velocity": {
+                "email_24h": 1 + _h(s + "|v_email") % 5,
+                "ip_24h": 1 + _h(s + "|v_ip") % 8,
+                "card_24h": 1 + _h(s + "|v_card") % 4,
+            },
+            "lists": {
+                "email_blacklisted": _bool(s + "|bl_email", 2),
+                "ip_blacklisted": _bool(s + "|bl_ip", 3),
+            },
+        },
+    }
+
+
+def generate_request(cfg: GeneratorConfig, i: int) -> Dict[str, Any]:
+    """EnrichRequest payload matching dataset row i"""
+    req, _ = _request(cfg, i)
+    payload = req.model_dump(mode="json", exclude_none=True)
+    payload["transaction_time"] = req.transaction_time.isoformat().replace("+00:00", "Z")
+    return payload
+
+
+_worker_cfg: Optional[GeneratorConfig] = None
+
+
+def _init_worker(params: Tuple[str, int, int, float, str, int]) -> None:
+    global _worker_cfg
+    # Mock email dates anchor to transaction_time so rows do not depend on wall-clock time
+    configure_clock("transaction")
+    _worker_cfg = GeneratorConfig(*params)
+
+
+def _render_chunk(task: Tuple[str, int, int]) -> str:
+    fmt, start, stop = task
+    cfg = _worker_cfg
+    build = generate_request if fmt == "requests" else generate_row
+    # Pure mocks: Ekata flags must not follow whatever match index the calling
+    # (or forking) process has configured
+    with match_index_scope(None):
+        lines = [json.dumps(build(cfg, i), separators=(",", ":")) for i in range(start, stop)]
+    if fmt == "json":
+        return ",\n".join(lines)
+    return "\n".join(lines) + "\n"
+
+
+def _chunks(fmt: str, rows: int, chunk_size: int) -> Iterator[Tuple[str, int, int]]:
+    for start in range(0, rows, chunk_size):
+        yield fmt, start, min(rows, start + chunk_size)
+
+
+def generate(cfg: GeneratorConfig, fmt: str, out: TextIO, workers: int = 1, chunk_size: int = 5000) -> int:
+    """Stream cfg.rows rows to `out` in the given format; returns rows written"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    tasks = _chunks(fmt, cfg.rows, chunk_size)
+
+    if fmt == "json":
+        out.write("[\n")
+    first = True
+
+    def emit(text: str) -> None:
+        nonlocal first
+        if fmt == "json" and text and not first:
+            out.write(",\n")
+        out.write(text)
+        first = False
+
+    if workers <= 1:
+        previous = clock_mode(), clock_epoch()
+        _init_worker(cfg.params())
+        try:
+            for task in tasks:
+                emit(_render_chunk(task))
+        finally:
+            configure_clock(*previous)
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(cfg.params(),)) as pool:
+            # imap keeps chunk order, so output matches the single-process run
+            for text in pool.imap(_render_chunk, tasks):
+                emit(text)
+
+    if fmt == "json":
+        out.write("\n]\n")
+    return cfg.rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", default="1")
+    parser.add_argument("--emails", type=int, help="size of the email pool (default: rows / 3)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="email reuse skew; 0 is uniform")
+    parser.add_argument("--start", default=DEFAULT_START, help="earliest transaction_time")
+    parser.add_argument("--span-days", type=int, default=365)
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--output", default="-", help="file path, or - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    cfg = GeneratorConfig(
+        seed=args.seed,
+        rows=args.rows,
+        emails=args.emails or max(1, args.rows // 3),
+        zipf=args.zipf,
+        start=args.start,
+        span_days=args.span_days,
+    )
+    if args.output == "-":
+        generate(cfg, args.format, sys.stdout, args.workers, args.chunk_size)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            generate(cfg, args.format, f, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
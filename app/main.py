@@ -1,29 +1,115 @@
 from __future__ import annotations
 
+import json
 import os
 from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .models import EnrichRequest, EkataRequest, EmailageRequest
-from .dataset import DatasetStore
+from .batch import BatchExecutor, DEFAULT_CHUNK_SIZE
+from .compact import DEFAULT_MAX_SHAPES, configure_shapes, shape_stats
+from .deadlines import DeadlineMiddleware
+from .dataset import DatasetStore, decode_cursor, encode_cursor, parse_transaction_time
+from .emails import configure_email_cache, email_cache_stats
+from .fastpath import FastValidationRoute
+from .scoring import configure_scoring
+from .sharding import HashRing, DEFAULT_VNODES, parse_shard_list
+from .tenants import TenantOverBudget, TenantPathMiddleware, TenantRegistry, parse_tenants
 from .enrich import (
     normalize_response,
     enrich_with_emailage,
     enrich_with_threatmetrix,
     enrich_with_ekata,
     enrich_ekata_service,
-    enrich_emailage_service
+    enrich_emailage_service,
+    configure_clock,
+    clock_mode,
+    configure_matching,
+    configure_mock_cache,
+    match_index_scope,
+    mock_cache_stats,
 )
+from .warmup import DEFAULT_WARMUP_CACHE_SIZE, warm_up
 
 load_dotenv()
 
 DATASET_PATH = os.getenv("DATASET_PATH", "data/sample_transactions.json")
 PORT = int(os.getenv("PORT", "8080"))
+CLOCK_MODE = os.getenv("CLOCK_MODE", "wall")
+CLOCK_EPOCH = os.getenv("CLOCK_EPOCH")
+SCORING_CONFIG = os.getenv("SCORING_CONFIG")
 
-store = DatasetStore(DATASET_PATH)
+DATASET_COMPACT = os.getenv("DATASET_COMPACT", "false").lower() in ("1", "true", "yes")
+INGEST_LOG = os.getenv("INGEST_LOG") or None
+COMPACT_INTERVAL = float(os.getenv("COMPACT_INTERVAL", "0"))
+COMPACT_MIN_ENTRIES = int(os.getenv("COMPACT_MIN_ENTRIES", "1000"))
+MATCH_ENGINE = os.getenv("MATCH_ENGINE", "true").lower() in ("1", "true", "yes")
+SHARDS = parse_shard_list(os.getenv("SHARDS"))
+SHARD_ID = os.getenv("SHARD_ID")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", str(DEFAULT_VNODES)))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+WARMUP_CAPTURE = os.getenv("WARMUP_CAPTURE") or None
+MOCK_CACHE_SIZE = int(os.getenv("MOCK_CACHE_SIZE") or (DEFAULT_WARMUP_CACHE_SIZE if WARMUP_CAPTURE else 0))
+WARMUP_BUDGET_SECONDS = float(os.getenv("WARMUP_BUDGET_SECONDS", "30"))
+WARMUP_MAX_ENTRIES = int(os.getenv("WARMUP_MAX_ENTRIES", "0"))
+TENANTS = parse_tenants(os.getenv("TENANTS"))
+TENANT_BUDGET_MB = float(os.getenv("TENANT_BUDGET_MB", "0"))
+TENANTS_TOTAL_BUDGET_MB = float(os.getenv("TENANTS_TOTAL_BUDGET_MB", "0"))
+FAST_VALIDATION = os.getenv("FAST_VALIDATION", "false").lower() in ("1", "true", "yes")
+EMAIL_CACHE_SIZE = int(os.getenv("EMAIL_CACHE_SIZE", "65536"))
+COMPACT_MAX_SHAPES = int(os.getenv("COMPACT_MAX_SHAPES", str(DEFAULT_MAX_SHAPES)))
+
+configure_clock(CLOCK_MODE, CLOCK_EPOCH)
+configure_scoring(SCORING_CONFIG)
+configure_mock_cache(MOCK_CACHE_SIZE)
+configure_email_cache(EMAIL_CACHE_SIZE if FAST_VALIDATION else 0)
+configure_shapes(COMPACT_MAX_SHAPES)
+
+if SHARDS and SHARD_ID:
+    # Sharded mode: only load the rows this instance owns on the ring
+    store = DatasetStore(
+        DATASET_PATH,
+        shard_filter=HashRing(SHARDS, SHARD_VNODES).owns(SHARD_ID),
+        compact=DATASET_COMPACT,
+        log_path=INGEST_LOG,
+        matching=MATCH_ENGINE,
+    )
+else:
+    store = DatasetStore(DATASET_PATH, compact=DATASET_COMPACT, log_path=INGEST_LOG, matching=MATCH_ENGINE)
+
+configure_matching(store.matches)
+
+
+def _tenant_store(name: str, dataset_path: str) -> DatasetStore:
+    return DatasetStore(
+        dataset_path,
+        compact=DATASET_COMPACT,
+        log_path=f"{INGEST_LOG}.{name}" if INGEST_LOG else None,
+        matching=MATCH_ENGINE,
+    )
+
+
+def _start_compactor(s: DatasetStore) -> None:
+    if COMPACT_INTERVAL > 0:
+        s.start_compactor(COMPACT_INTERVAL, COMPACT_MIN_ENTRIES)
+
+
+batch = BatchExecutor(store, BATCH_WORKERS, BATCH_CHUNK_SIZE)
+warmup_report: Optional[Dict[str, Any]] = None
+
+tenants = TenantRegistry(
+    TENANTS,
+    _tenant_store,
+    tenant_budget_bytes=int(TENANT_BUDGET_MB * 1024 * 1024),
+    total_budget_bytes=int(TENANTS_TOTAL_BUDGET_MB * 1024 * 1024),
+    on_load=_start_compactor,
+)
 
 app = FastAPI(title="Local Transaction Enrichment API", version="0.1.0")
 app.add_middleware(
@@ -32,11 +118,30 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TenantPathMiddleware)
+app.add_middleware(DeadlineMiddleware)
+if FAST_VALIDATION:
+    # Must be set before the routes below are declared
+    app.router.route_class = FastValidationRoute
 
 
 @app.on_event("startup")
 def startup() -> None:
+    global warmup_report
     store.load()
+    if WARMUP_CAPTURE:
+        # Runs before the app accepts traffic
+        warmup_report = warm_up(store, WARMUP_CAPTURE, WARMUP_BUDGET_SECONDS, WARMUP_MAX_ENTRIES)
+    # Batch workers load their dataset copies now rather than on the first batch
+    batch.start()
+    _start_compactor(store)
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    store.stop_compactor()
+    batch.close()
+    tenants.close()
 
 
 @app.get("/health")
@@ -45,42 +150,183 @@ def health():
         "status": "ok",
         "dataset_path": DATASET_PATH,
         "dataset_count": len(store.by_txid),
+        "dataset_skipped_rows": store.skipped_rows,
+        "clock_mode": clock_mode(),
+        "shard_id": SHARD_ID if SHARDS else None,
+        "ingest_pending": store.pending_log_entries,
+        "tenants": tenants.metrics(),
+        "mock_cache": mock_cache_stats(),
+        "fast_validation": FAST_VALIDATION,
+        "email_cache": email_cache_stats(),
+        "compact_shapes": shape_stats() if DATASET_COMPACT else None,
+        "warmup": warmup_report,
         "utc_now": datetime.now(timezone.utc).isoformat(),
     }
 
 
+def _store(x_tenant: Optional[str]) -> DatasetStore:
+    """Dataset for the request: the tenant named by X-Tenant (or /t/{tenant}/ prefix), else the default"""
+    if not x_tenant:
+        return store
+    if x_tenant not in tenants:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant {x_tenant!r}")
+    try:
+        return tenants.get(x_tenant)
+    except TenantOverBudget as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _find(req: EnrichRequest, x_shard_lookup: Optional[str], x_tenant: Optional[str]):
+    # The shard router sends "X-Shard-Lookup: txid" to the owning shard and
+    # performs the email fallback itself across all shards
+    s = _store(x_tenant)
+    row = s.find(req.transaction_id, str(req.data.email), email_fallback=(x_shard_lookup != "txid"))
+    if x_tenant:
+        tenants.record_lookup(x_tenant, row is not None)
+    return s, row
+
+
+@app.get("/internal/shard/email-latest")
+def shard_email_latest(email: str):
+    """Most recent local row for an email (scatter-gather target for the shard router)"""
+    row = store.latest_for_email(email)
+    if not row:
+        return {"transaction_id": None, "timestamp": None}
+    t = row.get("transaction", {})
+    return {"transaction_id": t.get("transaction_id"), "timestamp": parse_transaction_time(t.get("transaction_time"))}
+
+
+@app.post("/v1/ingest")
+def ingest(row: Dict[str, Any], x_tenant: Optional[str] = Header(default=None)):
+    """Add one decided transaction (dataset row format) to the live dataset"""
+    s = _store(x_tenant)
+    if not s.ingest(row):
+        raise HTTPException(
+            status_code=422,
+            detail="row needs a transaction object with a transaction_id owned by this instance "
+            "(and customer, if present, an object)",
+        )
+    return {"ingested": 1, "dataset_count": len(s.by_txid)}
+
+
+@app.post("/v1/ingest/bulk")
+def ingest_bulk(rows: List[Dict[str, Any]], x_tenant: Optional[str] = Header(default=None)):
+    """Add many rows; rows without a transaction_id (or owned by another shard) are skipped"""
+    s = _store(x_tenant)
+    count = s.ingest_many(rows)
+    return {"ingested": count, "skipped": len(rows) - count, "dataset_count": len(s.by_txid)}
+
+
+@app.get("/v1/export")
+def export(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    email: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    merchant_id: Optional[str] = None,
+    x_tenant: Optional[str] = Header(default=None),
+):
+    """
+    Stream dataset rows as NDJSON ordered by (transaction_time, transaction_id).
+    While more rows may follow, X-Next-Cursor holds the cursor for the next page
+    (which a selective filter can leave short, or empty, before the last page).
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    s = _store(x_tenant)
+    rows, next_key = s.export(
+        after,
+        limit,
+        email=email,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        merchant_id=merchant_id,
+    )
+    headers = {"X-Dataset-Version": str(s.version)}
+    if next_key is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_key)
+    lines = (json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
+
+
 @app.post("/v1/enrich")
-def enrich(req: EnrichRequest):
+def enrich(
+    req: EnrichRequest,
+    x_shard_lookup: Optional[str] = Header(default=None),
+    x_tenant: Optional[str] = Header(default=None),
+):
     """Enrich transaction with all external services (legacy endpoint)"""
-    row = store.find(req.transaction_id, str(req.data.email))
-    return normalize_response(req, row)
+    s, row = _find(req, x_shard_lookup, x_tenant)
+    with match_index_scope(s.matches):
+        return normalize_response(req, row)
+
+
+@app.post("/v1/enrich/batch")
+def enrich_batch(payloads: List[Dict[str, Any]], x_tenant: Optional[str] = Header(default=None)):
+    """
+    Enrich many transactions (each an /v1/enrich request body). Streams one
+    NDJSON line per request in request order; invalid requests yield an
+    {"error": "validation_error", ...} line in their position.
+    """
+    if SHARDS:
+        # Lookups here would only see this shard's rows; the router does not fan batches out
+        raise HTTPException(
+            status_code=501,
+            detail="batch enrichment is not available in sharded mode; send /v1/enrich requests through the router",
+        )
+    if x_tenant and BATCH_WORKERS > 1:
+        # The pool holds the default dataset only; tenants would silently run in-process
+        raise HTTPException(
+            status_code=501,
+            detail="batch enrichment for tenants is not available with BATCH_WORKERS > 1; use /v1/enrich",
+        )
+    executor = BatchExecutor(_store(x_tenant), 1, BATCH_CHUNK_SIZE) if x_tenant else batch
+    lines = (line + "\n" for line in executor.run(payloads))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
 
 @app.post("/v1/enrich/emailage")
-def enrich_emailage(req: EnrichRequest):
+def enrich_emailage(
+    req: EnrichRequest,
+    x_shard_lookup: Optional[str] = Header(default=None),
+    x_tenant: Optional[str] = Header(default=None),
+):
     """Enrich transaction with Emailage data only"""
-    row = store.find(req.transaction_id, str(req.data.email))
+    _, row = _find(req, x_shard_lookup, x_tenant)
     return enrich_with_emailage(req, row)
 
 
 @app.post("/v1/enrich/threatmetrix")
-def enrich_threatmetrix_endpoint(req: EnrichRequest):
+def enrich_threatmetrix_endpoint(
+    req: EnrichRequest,
+    x_shard_lookup: Optional[str] = Header(default=None),
+    x_tenant: Optional[str] = Header(default=None),
+):
     """Enrich transaction with ThreatMetrix data only"""
-    row = store.find(req.transaction_id, str(req.data.email))
+    _, row = _find(req, x_shard_lookup, x_tenant)
     return enrich_with_threatmetrix(req, row)
 
 
 @app.post("/v1/enrich/ekata")
-def enrich_ekata(req: EnrichRequest):
+def enrich_ekata(
+    req: EnrichRequest,
+    x_shard_lookup: Optional[str] = Header(default=None),
+    x_tenant: Optional[str] = Header(default=None),
+):
     """Enrich transaction with Ekata data only (legacy format)"""
-    row = store.find(req.transaction_id, str(req.data.email))
-    return enrich_with_ekata(req, row)
+    s, row = _find(req, x_shard_lookup, x_tenant)
+    with match_index_scope(s.matches):
+        return enrich_with_ekata(req, row)
 
 
 @app.post("/v1/ekata")
-def ekata_service(req: EkataRequest):
+def ekata_service(req: EkataRequest, x_tenant: Optional[str] = Header(default=None)):
     """Ekata identity verification service with simplified request/response"""
-    return enrich_ekata_service(req)
+    with match_index_scope(_store(x_tenant).matches):
+        return enrich_ekata_service(req)
 
 
 @app.post("/v1/emailage")
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+# USPS-style suffix abbreviations so "12 Main Street" and "12 main st." share a key
+_ADDRESS_WORDS = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "lane": "ln", "boulevard": "blvd",
+    "court": "ct", "place": "pl", "terrace": "ter", "highway": "hwy", "parkway": "pkwy", "circle": "cir",
+    "north": "n", "south": "s", "east": "e", "west": "w", "apartment": "apt", "suite": "ste",
+}
+
+NAME_MATCH_THRESHOLD = 0.85
+# Upper bound on fuzzily scored names per key, so a shared phone or address
+# (call centers, freight forwarders) cannot make a lookup slow
+MAX_FUZZY_CANDIDATES = 64
+
+Name = Tuple[str, str]
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii").lower()
+    return _SPACES.sub(" ", _NON_ALNUM.sub(" ", folded)).strip()
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Last 10 digits, so +1-555-0101 and (555) 0101 forms agree"""
+    digits = "".join(ch for ch in (value or "") if ch.isdigit())
+    return digits[-10:]
+
+
+def normalize_address(line1: Optional[str], zip_code: Optional[str]) -> str:
+    words = [_ADDRESS_WORDS.get(w, w) for w in normalize_text(line1).split()]
+    zip5 = "".join(ch for ch in (zip_code or "") if ch.isdigit())[:5]
+    if not words or not zip5:
+        return ""
+    return " ".join(words) + "|" + zip5
+
+
+@lru_cache(maxsize=65536)
+def _trigrams(value: str) -> FrozenSet[str]:
+    padded = f"  {value} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Dice coefficient over character trigrams of two normalized strings (0..1)"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = _trigrams(a), _trigrams(b)
+    return 2.0 * len(ta & tb) / (len(ta) + len(tb))
+
+
+class MatchIndex:
+    """
+    Normalized indexes from email, phone and billing address to the customer
+    names seen with them in the dataset. Lookups are exact on the normalized
+    key; names are then compared by trigram similarity over the (few)
+    candidates, so cost does not grow with the number of customers.
+    """
+
+    def __init__(self) -> None:
+        self.by_email: Dict[str, List[Name]] = {}
+        self.by_phone: Dict[str, List[Name]] = {}
+        self.by_address: Dict[str, List[Name]] = {}
+        # How many indexed records back each (index, key, name) entry, so removing
+        # one record keeps names other records still carry
+        self._refs: Dict[Tuple[int, str, Name], int] = {}
+
+    def clear(self) -> None:
+        self.by_email = {}
+        self.by_phone = {}
+        self.by_address = {}
+        self._refs = {}
+
+    def replace(self, other: "MatchIndex") -> None:
+        """Take over `other`'s indexes, keeping this object (shared via configure_matching) in place"""
+        self.by_email = other.by_email
+        self.by_phone = other.by_phone
+        self.by_address = other.by_address
+        self._refs = other._refs
+
+    def _put(self, kind: int, index: Dict[str, List[Name]], key: str, name: Name) -> None:
+        if not key:
+            return
+        ref = (kind, key, name)
+        count = self._refs.get(ref, 0)
+        self._refs[ref] = count + 1
+        if count:
+            return
+        names = index.get(key)
+        if names is None:
+            index[key] = [name]
+        else:
+            # Copy-on-write keeps lock-free readers consistent (writers are
+            # serialized by DatasetStore)
+            index[key] = names + [name]
+
+    def _drop(self, kind: int, index: Dict[str, List[Name]], key: str, name: Name) -> None:
+        ref = (kind, key, name)
+        count = self._refs.get(ref, 0)
+        if count > 1:
+            self._refs[ref] = count - 1
+            return
+        if not count:
+            return
+        del self._refs[ref]
+        names = [n for n in index.get(key, []) if n != name]
+        if names:
+            index[key] = names
+        else:
+            index.pop(key, None)
+
+    @staticmethod
+    def _entries(customer: Optional[Dict[str, Any]]) -> Optional[Tuple[Name, Tuple[str, str, str]]]:
+        """A record's normalized name and its (email, phone, address) keys, or None if it has no name"""
+        if not isinstance(customer, dict):
+            return None
+        first = normalize_text(customer.get("first_name"))
+        last = normalize_text(customer.get("last_name"))
+        if not first and not last:
+            return None
+        name = (sys.intern(first), sys.intern(last))
+        billing = ((customer.get("addresses") or {}).get("billing")) or {}
+        return name, (
+            (customer.get("email") or "").strip().lower(),
+            normalize_phone(customer.get("phone")),
+            normalize_address(billing.get("line1"), billing.get("zip")),
+        )
+
+    def add(self, customer: Optional[Dict[str, Any]]) -> None:
+        """Index one dataset `customer` record"""
+        entries = self._entries(customer)
+        if entries is None:
+            return
+        name, keys = entries
+        for kind, (index, key) in enumerate(zip((self.by_email, self.by_phone, self.by_address), keys)):
+            self._put(kind, index, key, name)
+
+    def remove(self, customer: Optional[Dict[str, Any]]) -> None:
+        """Undo add() for a record that was replaced; names other records carry stay"""
+        entries = self._entries(customer)
+        if entries is None:
+            return
+        name, keys = entries
+        for kind, (index, key) in enumerate(zip((self.by_email, self.by_phone, self.by_address), keys)):
+            if key:
+                self._drop(kind, index, key, name)
+
+    def match(
+        self,
+        first_name: Optional[str],
+        last_name: Optional[str],
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+        address_line1: Optional[str] = None,
+        address_zip: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Match flags for a request identity. A flag is None when the dataset has
+        no candidate for it, so callers can fall back to the mock value.
+        - email/phone/address_to_name_match: a name seen with that key matches
+        - first_name_match/last_name_match: over all candidates from any key
+        - name_similarity: best full-name similarity over all candidates (0-100)
+        """
+        first = normalize_text(first_name)
+        last = normalize_text(last_name)
+        target = (first, last)
+        full = f"{first} {last}".strip()
+
+        by_key = {
+            "email_to_name_match": self.by_email.get((email or "").strip().lower()) if email else None,
+            "phone_to_name_match": self.by_phone.get(normalize_phone(phone)) if phone else None,
+            "address_to_name_match": self.by_address.get(normalize_address(address_line1, address_zip)),
+        }
+
+        scores: Dict[Name, float] = {}
+        result: Dict[str, Any] = {}
+        for flag, names in by_key.items():
+            if not names:
+                result[flag] = None
+                continue
+            if target in names:
+                # Exact normalized match: no need to score the other candidates
+                scores[target] = 1.0
+                result[flag] = True
+                continue
+            best = 0.0
+            for name in names[:MAX_FUZZY_CANDIDATES]:
+                if name not in scores:
+                    scores[name] = similarity(full, f"{name[0]} {name[1]}".strip())
+                best = max(best, scores[name])
+            result[flag] = best >= NAME_MATCH_THRESHOLD
+
+        if scores:
+            result["first_name_match"] = any(n[0] == first for n in scores) or any(
+                similarity(first, n[0]) >= NAME_MATCH_THRESHOLD for n in scores)
+            result["last_name_match"] = any(n[1] == last for n in scores) or any(
+                similarity(last, n[1]) >= NAME_MATCH_THRESHOLD for n in scores)
+            result["name_similarity"] = int(round(100 * max(scores.values())))
+        else:
+            result["first_name_match"] = None
+            result["last_name_match"] = None
+            result["name_similarity"] = None
+        return result
@@ -3,7 +3,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict
+
+from .emails import CachedEmailStr
 
 
 class Address(BaseModel):
@@ -45,7 +47,7 @@ class RequestData(BaseModel):
     model_config = ConfigDict(extra="ignore")
     first_name: str
     last_name: str
-    email: EmailStr
+    email: CachedEmailStr
     ip: Optional[str] = None
     phone: Optional[str] = None
     city: Optional[str] = None
@@ -76,7 +78,7 @@ class ServiceRequestData(BaseModel):
     model_config = ConfigDict(extra="ignore")
     first_name: str
     last_name: str
-    email: EmailStr
+    email: CachedEmailStr
     ip: Optional[str] = None
     phone: Optional[str] = None
     city: Optional[str] = None
@@ -104,7 +106,7 @@ class EkataResponseData(BaseModel):
     model_config = ConfigDict(extra="ignore")
     fname: str
     l_name: str
-    email: EmailStr
+    email: CachedEmailStr
     ip: Optional[str] = None
     homephone: Optional[str] = None
     workphone: Optional[str] = None
@@ -122,6 +124,7 @@ class EkataPayload(BaseModel):
     email_risk: int
     ip_risk: int
     phone_risk: int
+    name_similarity: Optional[int] = None
 
 
 class EkataResponse(BaseModel):
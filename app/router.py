@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from .deadlines import DEADLINE_HEADER, DeadlineMiddleware, parse_deadline, remaining_ms
+from .sharding import HashRing, DEFAULT_VNODES, parse_shard_urls
+
+load_dotenv()
+
+SHARD_URLS = os.getenv("SHARD_URLS", "")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", str(DEFAULT_VNODES)))
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "10"))
+ROUTER_MAX_KEEPALIVE = int(os.getenv("ROUTER_MAX_KEEPALIVE", "64"))
+
+ENRICH_PATHS = ["/v1/enrich", "/v1/enrich/emailage", "/v1/enrich/threatmetrix", "/v1/enrich/ekata"]
+SERVICE_PATHS = ["/v1/ekata", "/v1/emailage"]
+
+
+def _routing_keys(body: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Pull transaction_id/request_id and email out of a raw request body, if present"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None, None
+    if not isinstance(payload, dict):
+        return None, None
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    key = payload.get("transaction_id") or payload.get("request_id")
+    email = data.get("email")
+    return (key if isinstance(key, str) else None), (email if isinstance(email, str) else None)
+
+
+def build_router(shard_urls: Dict[str, str], vnodes: int = DEFAULT_VNODES) -> FastAPI:
+    """
+    Front-end for a sharded deployment.
+    - /v1/enrich*: forwarded to the shard owning transaction_id with
+      "X-Shard-Lookup: txid"; on a miss the email fallback is scatter-gathered
+      from every shard and the request is re-sent to the shard holding the
+      most recent row for that email (shards that fail or time out are skipped)
+    - /v1/ekata, /v1/emailage: dataset-free, forwarded by request_id
+    - /v1/enrich/batch: answered 501 (clients fall back to /v1/enrich)
+    - X-Deadline-Ms is passed on minus the time already spent, and bounds
+      how long the router waits on each shard
+    - X-Tenant is dropped: tenants are not sharded
+    Shard names must match the SHARDS list the shard instances were started with.
+    """
+    ring = HashRing(list(shard_urls), vnodes)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[Dict[str, httpx.AsyncClient]]:
+        # One pooled client for the router's lifetime, reachable as request.state.client
+        async with httpx.AsyncClient(
+            timeout=ROUTER_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=ROUTER_MAX_KEEPALIVE),
+        ) as client:
+            yield {"client": client}
+
+    router = FastAPI(title="Local Transaction Enrichment Router", version="0.1.0", lifespan=lifespan)
+    router.add_middleware(DeadlineMiddleware)
+
+    async def forward(
+        client: httpx.AsyncClient,
+        shard: str,
+        path: str,
+        body: bytes,
+        headers: Dict[str, str],
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        if deadline is None:
+            return await client.post(shard_urls[shard] + path, content=body, headers=headers)
+        # Pass on what is left of the caller's budget and stop waiting when it runs out
+        budget = remaining_ms(deadline)
+        if budget <= 0:
+            return httpx.Response(504, json={"detail": "Deadline exceeded"})
+        headers = {**headers, DEADLINE_HEADER: str(budget)}
+        try:
+            return await client.post(
+                shard_urls[shard] + path, content=body, headers=headers, timeout=min(ROUTER_TIMEOUT, budget / 1000.0)
+            )
+        except httpx.TimeoutException:
+            return httpx.Response(504, json={"detail": "Deadline exceeded"})
+
+    async def email_latest(
+        client: httpx.AsyncClient, shard: str, email: str, deadline: Optional[float]
+    ) -> Tuple[str, Optional[float]]:
+        headers: Dict[str, str] = {}
+        timeout = ROUTER_TIMEOUT
+        if deadline is not None:
+            budget = remaining_ms(deadline)
+            if budget <= 0:
+                return shard, None
+            headers[DEADLINE_HEADER] = str(budget)
+            timeout = min(timeout, budget / 1000.0)
+        url = shard_urls[shard] + "/internal/shard/email-latest"
+        r = await client.get(url, params={"email": email}, headers=headers, timeout=timeout)
+        r.raise_for_status()
+        body = r.json()
+        return shard, (body["timestamp"] if body.get("transaction_id") else None)
+
+    def forward_headers(request: Request) -> Dict[str, str]:
+        # X-Tenant is deliberately not passed on: only the default dataset is sharded
+        return {"content-type": request.headers.get("content-type", "application/json")}
+
+    def to_response(r: httpx.Response, shard: str) -> Response:
+        return Response(
+            content=r.content,
+            status_code=r.status_code,
+            media_type=r.headers.get("content-type"),
+            headers={"X-Shard": shard},
+        )
+
+    async def route_enrich(request: Request) -> Response:
+        deadline = parse_deadline(request.headers)
+        body = await request.body()
+        headers = forward_headers(request)
+        txid, email = _routing_keys(body)
+        owner = ring.node_for(txid or "")
+        client = request.state.client
+
+        r = await forward(client, owner, request.url.path, body, {**headers, "X-Shard-Lookup": "txid"}, deadline)
+        if r.status_code != 200 or not email or r.json().get("dataset_hit"):
+            return to_response(r, owner)
+
+        # Email fallback: ask every shard for its most recent row and pick the newest;
+        # a shard that errors or runs out of time counts as having none
+        results = await asyncio.gather(*(email_latest(client, shard, email, deadline) for shard in ring.nodes),
+                                       return_exceptions=True)
+        found = [result for result in results if not isinstance(result, BaseException)]
+        candidates = [(ts, shard) for shard, ts in found if ts is not None]
+        if not candidates:
+            return to_response(r, owner)
+        _, best = max(candidates)
+        r = await forward(client, best, request.url.path, body, headers, deadline)
+        return to_response(r, best)
+
+    async def route_service(request: Request) -> Response:
+        deadline = parse_deadline(request.headers)
+        body = await request.body()
+        headers = forward_headers(request)
+        key, _ = _routing_keys(body)
+        shard = ring.node_for(key or "")
+        r = await forward(request.state.client, shard, request.url.path, body, headers, deadline)
+        return to_response(r, shard)
+
+    for path in ENRICH_PATHS:
+        router.add_api_route(path, route_enrich, methods=["POST"])
+    for path in SERVICE_PATHS:
+        router.add_api_route(path, route_service, methods=["POST"])
+
+    @router.post("/v1/enrich/batch")
+    async def batch_not_routed() -> None:
+        # Batches are not split across shards; say so instead of a bare 404
+        raise HTTPException(
+            status_code=501, detail="batch enrichment is not routed across shards; send /v1/enrich requests"
+        )
+
+    @router.get("/health")
+    async def health():
+        return {"status": "ok", "shards": shard_urls, "vnodes": vnodes}
+
+    return router
+
+
+app = build_router(parse_shard_urls(SHARD_URLS), SHARD_VNODES)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import operator
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - batch scoring falls back to the per-row path
+    np = None
+
+
+# Matches the original hard-coded blend: 0.55 * ThreatMetrix + 0.45 * Emailage,
+# REVIEW at 60 and above, three flag-based reason codes.
+DEFAULT_SCORING_CONFIG: Dict[str, Any] = {
+    "inputs": [
+        {"name": "threatmetrix", "path": "external_services.threatmetrix.risk_score", "weight": 0.55},
+        {"name": "emailage", "path": "external_services.emailage.score", "weight": 0.45},
+    ],
+    "thresholds": [
+        {"min_score": 60, "action": "REVIEW"},
+    ],
+    "default_action": "ALLOW",
+    "reason_codes": [
+        {"code": "IP_PROXY", "path": "transaction.network.ip_proxy"},
+        {"code": "DISPOSABLE_EMAIL", "path": "external_services.emailage.disposable"},
+        {"code": "BOT_DETECTED", "path": "external_services.threatmetrix.bot_detected"},
+    ],
+}
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _get_path(payload: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = payload
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _get_columns(payloads: Sequence[Dict[str, Any]], paths: Sequence[Tuple[str, ...]]) -> List[List[Any]]:
+    """
+    Values at each path for every payload, one list per path (None where missing).
+    Each path prefix is walked once for the whole batch and shared by paths that
+    start with it, so features under the same service are not re-walked per row.
+    """
+    levels: Dict[Tuple[str, ...], List[Any]] = {(): list(payloads)}
+
+    def column(path: Tuple[str, ...]) -> List[Any]:
+        values = levels.get(path)
+        if values is None:
+            key = path[-1]
+            values = levels[path] = [v.get(key) if isinstance(v, dict) else None for v in column(path[:-1])]
+        return values
+
+    return [column(path) for path in paths]
+
+
+class ScoringEngine:
+    """
+    Risk scoring compiled once from a config dict.
+    - inputs: weighted scores summed in order into blended_score
+    - thresholds: highest min_score reached picks recommended_action
+    - reason_codes: a code is emitted when the value at its path is truthy,
+      or satisfies "op"/"value" when given
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or DEFAULT_SCORING_CONFIG
+        try:
+            self.inputs: List[Tuple[Tuple[str, ...], float]] = [
+                (tuple(i["path"].split(".")), float(i["weight"])) for i in config["inputs"]
+            ]
+            self.thresholds: List[Tuple[int, str]] = sorted(
+                ((int(t["min_score"]), str(t["action"])) for t in config.get("thresholds", [])),
+                reverse=True,
+            )
+            self.default_action = str(config.get("default_action", "ALLOW"))
+            self.rules: List[Tuple[str, Tuple[str, ...], Optional[Callable[[Any, Any], bool]], Any]] = []
+            for rule in config.get("reason_codes", []):
+                op = rule.get("op")
+                if op is not None and op not in _OPS:
+                    raise ValueError(f"Unknown reason code op {op!r}")
+                self.rules.append((rule["code"], tuple(rule["path"].split(".")), _OPS.get(op), rule.get("value")))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid scoring config: {e}") from e
+
+    @classmethod
+    def from_file(cls, path: str) -> "ScoringEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _rule_hits(self, payload: Dict[str, Any]) -> List[bool]:
+        hits = []
+        for _, path, op, value in self.rules:
+            v = _get_path(payload, path)
+            hits.append(bool(v) if op is None else (v is not None and op(v, value)))
+        return hits
+
+    def _action(self, blended: int) -> str:
+        for min_score, action in self.thresholds:
+            if blended >= min_score:
+                return action
+        return self.default_action
+
+    def score(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Risk summary for one transaction payload"""
+        blended = 0.0
+        for path, weight in self.inputs:
+            blended = blended + weight * int(_get_path(payload, path) or 0)
+        blended = int(round(blended))
+        hits = self._rule_hits(payload)
+        return {
+            "blended_score": blended,
+            "reason_codes": [rule[0] for rule, hit in zip(self.rules, hits) if hit],
+            "recommended_action": self._action(blended),
+        }
+
+    def score_batch(self, payloads: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Risk summaries for many payloads; vectorized with NumPy when it is installed"""
+        if np is None or not payloads:
+            return [self.score(p) for p in payloads]
+
+        n = len(payloads)
+        columns = _get_columns(payloads, [path for path, _ in self.inputs] + [rule[1] for rule in self.rules])
+        blended = np.zeros(n, dtype=np.float64)
+        # Accumulate column by column so float results match score() exactly
+        for values, (_, weight) in zip(columns, self.inputs):
+            blended = blended + weight * np.fromiter((int(v or 0) for v in values), dtype=np.float64, count=n)
+        # np.rint rounds half to even, like round()
+        blended_int = np.rint(blended).astype(np.int64)
+
+        action_idx = np.full(n, len(self.thresholds), dtype=np.int64)
+        for idx in range(len(self.thresholds) - 1, -1, -1):
+            action_idx[blended_int >= self.thresholds[idx][0]] = idx
+        actions = [action for _, action in self.thresholds] + [self.default_action]
+
+        hits = np.zeros((n, len(self.rules)), dtype=bool)
+        for col, (values, (_, _, op, value)) in enumerate(zip(columns[len(self.inputs):], self.rules)):
+            if op is None:
+                hits[:, col] = np.fromiter(map(bool, values), dtype=bool, count=n)
+            else:
+                hits[:, col] = np.fromiter((v is not None and op(v, value) for v in values), dtype=bool, count=n)
+        codes = [rule[0] for rule in self.rules]
+
+        return [
+            {
+                "blended_score": b,
+                "reason_codes": [codes[j] for j in np.flatnonzero(row_hits)],
+                "recommended_action": actions[a],
+            }
+            for b, a, row_hits in zip(blended_int.tolist(), action_idx.tolist(), hits)
+        ]
+
+
+_engine = ScoringEngine()
+
+
+def configure_scoring(path: Optional[str] = None) -> None:
+    """Load and compile the scoring config; no path restores the default config"""
+    global _engine
+    _engine = ScoringEngine.from_file(path) if path else ScoringEngine()
+
+
+def get_engine() -> ScoringEngine:
+    return _engine
+
+
+def set_engine(engine: ScoringEngine) -> None:
+    """Install an already compiled engine (e.g. one handed to a spawned worker)"""
+    global _engine
+    _engine = engine
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+DEFAULT_VNODES = 128
+
+
+def _ring_hash(key: str) -> int:
+    digest = hashlib.md5(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class _Owns:
+    """HashRing.owns predicate; a class rather than a lambda so it pickles to spawned workers"""
+
+    def __init__(self, ring: "HashRing", node: str):
+        self.ring = ring
+        self.node = node
+
+    def __call__(self, key: str) -> bool:
+        return self.ring.node_for(key) == self.node
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+    Each node is placed `vnodes` times on the ring; a key belongs to the first
+    virtual node clockwise from its hash. Adding or removing a node only moves
+    the keys adjacent to that node's virtual points.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = DEFAULT_VNODES):
+        if vnodes < 1:
+            raise ValueError("vnodes must be >= 1")
+        self.vnodes = vnodes
+        self.nodes: List[str] = []
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _ring_hash(f"{node}#{i}")
+            idx = bisect.bisect_left(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        kept = [(p, n) for p, n in zip(self._points, self._owners) if n != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [n for _, n in kept]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("hash ring has no nodes")
+        idx = bisect.bisect_right(self._points, _ring_hash(key))
+        if idx == len(self._points):
+            idx = 0
+        return self._owners[idx]
+
+    def owns(self, node: str) -> Callable[[str], bool]:
+        """Predicate selecting the keys that belong to `node` (for DatasetStore.shard_filter)"""
+        if node not in self.nodes:
+            raise ValueError(f"Unknown shard {node!r}, expected one of {', '.join(self.nodes)}")
+        return _Owns(self, node)
+
+
+def parse_shard_list(value: Optional[str]) -> List[str]:
+    """Parse "shard-0,shard-1" into a list of shard names"""
+    return [s.strip() for s in (value or "").split(",") if s.strip()]
+
+
+def parse_shard_urls(value: Optional[str]) -> Dict[str, str]:
+    """Parse "shard-0=http://127.0.0.1:8081,shard-1=http://127.0.0.1:8082" into {name: url}"""
+    urls: Dict[str, str] = {}
+    for item in parse_shard_list(value):
+        name, sep, url = item.partition("=")
+        if not sep or not name.strip() or not url.strip():
+            raise ValueError(f"Invalid shard entry {item!r}, expected name=url")
+        urls[name.strip()] = url.strip().rstrip("/")
+    return urls
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .dataset import DatasetStore
+
+TENANT_HEADER = "x-tenant"
+_TENANT_PATH = re.compile(r"^/t/([A-Za-z0-9_.-]+)(/.*)$")
+# Loaded datasets take several times their JSON file size (about 6x for the
+# sample data); this floor lets clearly oversized files be refused unread
+MIN_LOADED_BYTES_PER_FILE_BYTE = 2
+
+
+class TenantOverBudget(Exception):
+    """A tenant's dataset does not fit in its memory budget"""
+
+
+def parse_tenants(value: Optional[str]) -> Dict[str, str]:
+    """Parse "acme=data/acme.json,globex=data/globex.json" into {name: dataset_path}"""
+    tenants: Dict[str, str] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid tenant entry {item!r}, expected name=dataset_path")
+        tenants[name.strip()] = path.strip()
+    return tenants
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class _Tenant:
+    def __init__(self, name: str, dataset_path: str):
+        self.name = name
+        self.dataset_path = dataset_path
+        self.store: Optional[DatasetStore] = None
+        self.estimated_bytes = 0
+        self.over_budget_bytes = 0
+        # Dataset file (size, mtime) when it was found over budget
+        self.over_budget_file: Optional[Tuple[int, int]] = None
+        self.requests = 0
+        self.dataset_hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.last_used: Optional[datetime] = None
+        self.load_lock = threading.Lock()
+
+
+class TenantRegistry:
+    """
+    Named datasets, loaded lazily on first use.
+    - tenant_budget_bytes: a tenant whose estimated size exceeds it is unloaded
+      again and TenantOverBudget is raised; datasets whose file alone is too
+      big are refused without loading. The refusal sticks until the dataset
+      file changes
+    - total_budget_bytes: after each load the least recently used tenants are
+      evicted until the loaded total fits (the tenant just loaded stays)
+    A budget of 0 means unlimited. Sizes come from DatasetStore.estimate_bytes.
+    """
+
+    def __init__(
+        self,
+        tenants: Dict[str, str],
+        store_factory: Callable[[str, str], DatasetStore],
+        tenant_budget_bytes: int = 0,
+        total_budget_bytes: int = 0,
+        on_load: Optional[Callable[[DatasetStore], None]] = None,
+    ):
+        self.store_factory = store_factory
+        self.on_load = on_load
+        self.tenant_budget_bytes = tenant_budget_bytes
+        self.total_budget_bytes = total_budget_bytes
+        self._tenants = {name: _Tenant(name, path) for name, path in tenants.items()}
+        # Loaded tenants, least recently used first
+        self._lru: "OrderedDict[str, _Tenant]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tenants
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tenants)
+
+    def get(self, name: str) -> DatasetStore:
+        """Store for a tenant, loading it if needed; KeyError for unknown tenants"""
+        tenant = self._tenants[name]
+        with self._lock:
+            tenant.requests += 1
+            tenant.last_used = datetime.now(timezone.utc)
+            if tenant.store is not None:
+                self._lru.move_to_end(name)
+                return tenant.store
+
+        with tenant.load_lock:
+            if tenant.store is not None:
+                return tenant.store
+            file = _file_signature(tenant.dataset_path)
+            if tenant.over_budget_bytes:
+                if file == tenant.over_budget_file:
+                    # Known not to fit; do not pay for another load attempt
+                    raise self._over_budget(tenant)
+                tenant.over_budget_bytes = 0
+                tenant.over_budget_file = None
+            if self.tenant_budget_bytes and file is not None:
+                floor = file[0] * MIN_LOADED_BYTES_PER_FILE_BYTE
+                if floor > self.tenant_budget_bytes:
+                    tenant.over_budget_bytes, tenant.over_budget_file = floor, file
+                    raise self._over_budget(tenant)
+            store = self.store_factory(name, tenant.dataset_path)
+            store.load()
+            size = store.estimate_bytes()
+            if self.tenant_budget_bytes and size > self.tenant_budget_bytes:
+                tenant.over_budget_bytes, tenant.over_budget_file = size, file
+                raise self._over_budget(tenant)
+            if self.on_load is not None:
+                self.on_load(store)
+            with self._lock:
+                tenant.store = store
+                tenant.estimated_bytes = size
+                tenant.loads += 1
+                self._lru[name] = tenant
+                self._evict_over_budget(keep=name)
+            return store
+
+    def _over_budget(self, tenant: _Tenant) -> TenantOverBudget:
+        return TenantOverBudget(
+            f"tenant {tenant.name!r} needs ~{tenant.over_budget_bytes} bytes, budget is {self.tenant_budget_bytes}"
+        )
+
+    def record_lookup(self, name: str, hit: bool) -> None:
+        if hit:
+            self._tenants[name].dataset_hits += 1
+
+    def _evict_over_budget(self, keep: str) -> None:
+        if not self.total_budget_bytes:
+            return
+        total = sum(t.estimated_bytes for t in self._lru.values())
+        for name in list(self._lru):
+            if total <= self.total_budget_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._lru[name].estimated_bytes
+            self._unload(name)
+
+    def _unload(self, name: str) -> None:
+        tenant = self._lru.pop(name)
+        if tenant.store is not None:
+            tenant.store.stop_compactor()
+        tenant.store = None
+        tenant.estimated_bytes = 0
+        tenant.evictions += 1
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            if name not in self._lru:
+                return False
+            self._unload(name)
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            for name in list(self._lru):
+                self._unload(name)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    "dataset_path": t.dataset_path,
+                    "loaded": t.store is not None,
+                    "dataset_count": len(t.store.by_txid) if t.store is not None else 0,
+                    "estimated_bytes": t.estimated_bytes,
+                    "over_budget": bool(t.over_budget_bytes),
+                    "requests": t.requests,
+                    "dataset_hits": t.dataset_hits,
+                    "loads": t.loads,
+                    "evictions": t.evictions,
+                    "last_used": t.last_used.isoformat() if t.last_used else None,
+                }
+                for name, t in self._tenants.items()
+            }
+
+
+class TenantPathMiddleware:
+    """
+    ASGI middleware mapping /t/{tenant}/v1/... onto /v1/... with an
+    X-Tenant header, so path-prefix and header selection share one code path.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            m = _TENANT_PATH.match(scope["path"])
+            if m:
+                tenant, path = m.groups()
+                headers: List[Tuple[bytes, bytes]] = [
+                    (k, v) for k, v in scope["headers"] if k.lower() != TENANT_HEADER.encode()
+                ]
+                headers.append((TENANT_HEADER.encode(), tenant.encode()))
+                scope = dict(scope, path=path, raw_path=path.encode(), headers=headers)
+        await self.app(scope, receive, send)
@@ -0,0 +1,97 @@
+"""
+Startup warm-up from a traffic capture.
+
+The capture is NDJSON, one request per line, either a bare /v1/enrich body
+(the `python -m app.generate --format requests` output) or
+{"path": "/v1/enrich/ekata", "body": {...}} for other endpoints. Each entry is
+run through the same enrichment function its endpoint uses, which fills the
+mock cache and touches dataset rows and lazily initialized code paths before
+the service reports ready.
+"""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .dataset import DatasetStore
+from .enrich import (
+    enrich_ekata_service,
+    enrich_emailage_service,
+    enrich_with_ekata,
+    enrich_with_emailage,
+    enrich_with_threatmetrix,
+    match_index_scope,
+    mock_cache_stats,
+    normalize_response,
+)
+from .models import EkataRequest, EmailageRequest, EnrichRequest
+
+# MOCK_CACHE_SIZE used when WARMUP_CAPTURE is set without one; with no cache
+# the replay would only touch code paths and keep nothing
+DEFAULT_WARMUP_CACHE_SIZE = 65536
+
+_ENRICH_HANDLERS: Dict[str, Callable[[EnrichRequest, Optional[Dict[str, Any]]], Any]] = {
+    "/v1/enrich": normalize_response,
+    "/v1/enrich/emailage": enrich_with_emailage,
+    "/v1/enrich/threatmetrix": enrich_with_threatmetrix,
+    "/v1/enrich/ekata": enrich_with_ekata,
+}
+
+
+def _replay(store: DatasetStore, path: str, body: Dict[str, Any]) -> None:
+    if path in _ENRICH_HANDLERS:
+        req = EnrichRequest.model_validate(body)
+        _ENRICH_HANDLERS[path](req, store.find(req.transaction_id, str(req.data.email)))
+    elif path == "/v1/ekata":
+        enrich_ekata_service(EkataRequest.model_validate(body))
+    elif path == "/v1/emailage":
+        enrich_emailage_service(EmailageRequest.model_validate(body))
+    else:
+        raise ValueError(f"unsupported path {path!r}")
+
+
+def _parse(line: str) -> Tuple[str, Dict[str, Any]]:
+    entry = json.loads(line)
+    if isinstance(entry, dict) and "body" in entry and "path" in entry:
+        return entry["path"], entry["body"]
+    return "/v1/enrich", entry
+
+
+def warm_up(store: DatasetStore, capture_path: str, budget_seconds: float, max_entries: int = 0) -> Dict[str, Any]:
+    """
+    Replay capture entries until the file, `max_entries` (0 = no limit) or the
+    time budget runs out. Returns a report for /health: `replayed` counts
+    capture lines run, `cached` the mock cache entries they added.
+    """
+    started = time.perf_counter()
+    cache_size_before = mock_cache_stats()["size"]
+    replayed = errors = 0
+    budget_exhausted = False
+
+    with open(capture_path, "r", encoding="utf-8") as f, match_index_scope(store.matches):
+        for line in f:
+            if not line.strip():
+                continue
+            if time.perf_counter() - started >= budget_seconds:
+                budget_exhausted = True
+                break
+            if max_entries and replayed + errors >= max_entries:
+                break
+            try:
+                _replay(store, *_parse(line))
+                replayed += 1
+            except (ValueError, ValidationError, TypeError):
+                errors += 1
+
+    return {
+        "capture_path": capture_path,
+        "replayed": replayed,
+        "cached": mock_cache_stats()["size"] - cache_size_before,
+        "errors": errors,
+        "budget_exhausted": budget_exhausted,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "mock_cache": mock_cache_stats(),
+    }
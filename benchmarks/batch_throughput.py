@@ -0,0 +1,65 @@
+"""
+Batch enrichment throughput by worker count.
+
+    python -m benchmarks.batch_throughput --rows 50000 --requests 50000
+
+Builds a synthetic dataset and matching replay requests (app.generate), then
+times BatchExecutor.run over them for 1, 2, 4, ... workers up to the core count.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+from app.batch import BatchExecutor, DEFAULT_CHUNK_SIZE
+from app.dataset import DatasetStore
+from app.enrich import configure_clock
+from app.generate import GeneratorConfig, generate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    configure_clock("transaction")
+    cfg = GeneratorConfig(seed="bench", rows=args.rows, emails=max(1, args.rows // 3),
+                          zipf=1.1, start="2025-01-01T00:00:00Z", span_days=365)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        generate(cfg, "json", f, workers=args.max_workers)
+        dataset_path = f.name
+    # Same seed: request i replays dataset row i (requests beyond --rows are misses)
+    out = io.StringIO()
+    cfg.rows = args.requests
+    generate(cfg, "requests", out, workers=args.max_workers)
+    payloads = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    store = DatasetStore(dataset_path)
+    store.load()
+    print(f"{len(store.by_txid)} rows, {len(payloads)} requests, {os.cpu_count()} cores")
+
+    workers = 1
+    baseline = None
+    while workers <= args.max_workers:
+        executor = BatchExecutor(store, workers, args.chunk_size)
+        executor.start()
+        t0 = time.perf_counter()
+        count = sum(1 for _ in executor.run(payloads))
+        elapsed = time.perf_counter() - t0
+        executor.close()
+        rate = count / elapsed
+        baseline = baseline or rate
+        print(f"workers={workers:>3}: {rate:10.0f} req/s  ({rate / baseline:.2f}x)")
+        workers *= 2
+    os.remove(dataset_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+MatchIndex lookup latency at scale.
+
+    python -m benchmarks.match_latency --customers 1000000
+
+Indexes synthetic customers (app.generate) and times match() for known
+customers, for the same customers with a misspelled name, and for unknown
+identities.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.generate import GeneratorConfig, _customer
+from app.matching import MatchIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    cfg = GeneratorConfig(seed="bench", rows=args.customers, emails=args.customers, zipf=0.0,
+                          start="2025-01-01T00:00:00Z", span_days=365)
+    index = MatchIndex()
+    t0 = time.perf_counter()
+    for rank in range(args.customers):
+        index.add(_customer(cfg, rank))
+    print(f"indexed {args.customers} customers in {time.perf_counter() - t0:.1f}s")
+
+    step = max(1, args.customers // args.lookups)
+    probes = [_customer(cfg, rank) for rank in range(0, args.customers, step)][:args.lookups]
+
+    def run(label, make_args):
+        calls = [make_args(c) for c in probes]
+        t0 = time.perf_counter()
+        for a in calls:
+            index.match(*a)
+        per_call = (time.perf_counter() - t0) / len(calls)
+        print(f"{label:>12}: {per_call * 1e6:8.1f} us/match")
+
+    def known(c):
+        b = c["addresses"]["billing"]
+        return c["first_name"], c["last_name"], c["email"], c["phone"], b["line1"], b["zip"]
+
+    def misspelled(c):
+        b = c["addresses"]["billing"]
+        return c["first_name"] + "e", c["last_name"], c["email"], c["phone"], b["line1"], b["zip"]
+
+    def unknown(c):
+        return "Nobody", "Known", "nobody@nowhere.test", "+1-999-000-0000", "1 Nowhere Rd", "00000"
+
+    run("known", known)
+    run("misspelled", misspelled)
+    run("unknown", unknown)
+
+
+if __name__ == "__main__":
+    main()
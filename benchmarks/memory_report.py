@@ -0,0 +1,121 @@
+"""
+Resident memory per DatasetStore row, plain dicts vs compact records.
+
+    python -m benchmarks.memory_report                 # 100k and 1M rows
+    python -m benchmarks.memory_report --rows 50000
+
+Each (mode, rows) case runs in its own subprocess and reports the RSS growth
+after loading divided by the row count. Rows are decoded with shared key
+strings, the way json.load memoizes keys across one file.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, Iterator, List
+
+from app.dataset import DatasetStore
+
+CURRENCIES = ["USD", "USD", "USD", "CAD", "EUR", "GBP"]
+STATUSES = ["Completed", "Declined", "Review", "Pending"]
+DECISIONS = ["APPROVE", "REVIEW", "DECLINE"]
+CHANNELS = ["web", "mobile", "ivr"]
+MERCHANTS = ["M12345", "M67890", "M24680"]
+NETWORKS = ["VISA", "MASTERCARD", "AMEX", "DISCOVER"]
+COUNTRIES = ["US", "CA", "MX", "GB", "IN"]
+POLICIES = ["ALLOW", "REVIEW", "REJECT"]
+
+
+def _row_text(i: int) -> str:
+    row = {
+        "transaction": {
+            "transaction_id": f"tx_{i:08d}",
+            "transaction_time": f"2026-01-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:{(i * 7) % 60:02d}Z",
+            "status": STATUSES[i % 4],
+            "decision": DECISIONS[i % 3],
+            "amounts": {"total_amount": round((i * 37 % 19999) / 100.0, 2), "currency": CURRENCIES[i % 6]},
+            "channel": CHANNELS[i % 3],
+            "merchant": {"merchant_id": MERCHANTS[i % 3], "mcc": "4814", "country": "US"},
+            "payment": {"card": {"bin": f"{400000 + i % 99999}", "last4": f"{i % 10000:04d}", "network": NETWORKS[i % 4]}},
+            "network": {"ip": f"73.{i % 256}.{(i // 256) % 256}.{i % 97}", "ip_country": COUNTRIES[i % 5], "ip_proxy": i % 9 == 0},
+        },
+        "customer": {
+            "first_name": f"first{i % 5000}",
+            "last_name": f"last{i % 7919}",
+            "email": f"user{i // 3}@example.com",
+            "phone": f"+1-555-{i % 10000:04d}",
+            "addresses": {"billing": {"line1": f"{i % 999} Main St", "city": "hyd", "state": "in", "zip": f"{i % 99999:05d}", "country": "US"}},
+        },
+        "external_services": {
+            "emailage": {"score": i % 101, "email_first_seen": "2019-07-10T00:00:00Z", "email_last_seen": "2026-01-09T00:00:00Z",
+                         "domain_exists": True, "disposable": i % 14 == 0, "free_provider": i % 2 == 0},
+            "threatmetrix": {"risk_score": (i * 3) % 101, "policy": POLICIES[i % 3], "device_risk": (i * 5) % 101,
+                             "ip_risk": (i * 11) % 101, "true_ip": True, "bot_detected": i % 11 == 0},
+            "ekata": {"identity_confidence": (i * 13) % 101, "phone_to_name_match": True,
+                      "address_to_name_match": i % 3 != 0, "email_to_name_match": i % 4 != 0},
+        },
+        "features": {
+            "velocity": {"email_24h": i % 5, "ip_24h": i % 7, "card_24h": i % 3},
+            "lists": {"email_blacklisted": False, "ip_blacklisted": i % 50 == 0},
+        },
+    }
+    return json.dumps(row)
+
+
+def _rows(n: int) -> Iterator[Dict[str, Any]]:
+    keys: Dict[str, str] = {}
+
+    def hook(pairs: List[Any]) -> Dict[str, Any]:
+        return {keys.setdefault(k, k): v for k, v in pairs}
+
+    for i in range(n):
+        yield json.loads(_row_text(i), object_pairs_hook=hook)
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(rows: int, compact: bool) -> float:
+    store = DatasetStore("", compact=compact, matching=False)
+    gc.collect()
+    before = _rss()
+    for row in _rows(rows):
+        store.add(row)
+    gc.collect()
+    return (_rss() - before) / rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, action="append", help="row counts (default: 100000 and 1000000)")
+    parser.add_argument("--case", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, rows = args.case
+        print(f"{measure(int(rows), mode == 'compact'):.0f}")
+        return
+
+    print(f"{'rows':>10} {'plain B/row':>12} {'compact B/row':>14} {'saving':>7}")
+    for rows in args.rows or [100_000, 1_000_000]:
+        result = {}
+        for mode in ("plain", "compact"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.memory_report", "--case", mode, str(rows)],
+                capture_output=True, text=True,
+            )
+            # A case that runs out of memory is reported rather than aborting the table
+            result[mode] = float(out.stdout) if out.returncode == 0 else None
+        cells = [f"{result[m]:.0f}" if result[m] else "n/a" for m in ("plain", "compact")]
+        saving = f"{1 - result['compact'] / result['plain']:.0%}" if all(result.values()) else "-"
+        print(f"{rows:>10} {cells[0]:>12} {cells[1]:>14} {saving:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Request validation cost per endpoint: standard FastAPI routes vs FAST_VALIDATION.
+
+    python -m benchmarks.validation --requests 5000
+
+Calls each hot endpoint in-process (ASGI, no sockets) through the standard app
+and through a copy of its routes using FastValidationRoute with the email
+cache enabled, and reports mean microseconds per request. Also times the
+validation step on its own (json.loads + model_validate vs model_validate_json).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from app.emails import configure_email_cache
+from app.enrich import configure_clock
+from app.fastpath import FastValidationRoute
+from app.main import app, store
+from app.models import EkataRequest, EnrichRequest
+
+ENRICH = {
+    "request_id": "req_bench",
+    "transaction_id": "tx_1001",
+    "transaction_time": "2026-01-14T05:22:31Z",
+    "data": {"first_name": "Vishnu", "last_name": "Reddy", "email": "vik@example.com", "ip": "73.14.55.10"},
+}
+SERVICE = {"request_id": "req_bench", "data": {"first_name": "Bob", "last_name": "Jones", "email": "bob@test.com"}}
+ENDPOINTS = [
+    ("/v1/enrich", ENRICH),
+    ("/v1/enrich/emailage", ENRICH),
+    ("/v1/enrich/threatmetrix", ENRICH),
+    ("/v1/enrich/ekata", ENRICH),
+    ("/v1/ekata", SERVICE),
+    ("/v1/emailage", SERVICE),
+]
+
+
+def _fast_app() -> FastAPI:
+    fast = FastAPI()
+    fast.router.route_class = FastValidationRoute
+    for r in app.routes:
+        if isinstance(r, APIRoute):
+            fast.add_api_route(r.path, r.endpoint, methods=list(r.methods))
+    return fast
+
+
+async def _time_endpoint(target: FastAPI, path: str, body: bytes, n: int) -> float:
+    headers = {"content-type": "application/json"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://bench") as client:
+        for _ in range(min(n, 100)):
+            await client.post(path, content=body, headers=headers)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            r = await client.post(path, content=body, headers=headers)
+        assert r.status_code == 200, r.text
+        return (time.perf_counter() - t0) / n * 1e6
+
+
+def _time_validation(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    store.load()
+    configure_clock("fixed")
+    fast = _fast_app()
+
+    for label, model, payload in (("EnrichRequest", EnrichRequest, ENRICH), ("EkataRequest", EkataRequest, SERVICE)):
+        raw = json.dumps(payload).encode()
+        configure_email_cache(0)
+        std = _time_validation(lambda: model.model_validate(json.loads(raw)), args.requests * 4)
+        configure_email_cache(65536)
+        one = _time_validation(lambda: model.model_validate_json(raw), args.requests * 4)
+        print(f"validate {label:<14} standard {std:7.1f} us   fast {one:7.1f} us   x{std / one:.2f}")
+
+    print(f"{'endpoint':<26} {'standard us':>12} {'fast us':>10} {'speedup':>8}")
+    for path, payload in ENDPOINTS:
+        body = json.dumps(payload).encode()
+        configure_email_cache(0)
+        std = asyncio.run(_time_endpoint(app, path, body, args.requests))
+        configure_email_cache(65536)
+        fst = asyncio.run(_time_endpoint(fast, path, body, args.requests))
+        print(f"{path:<26} {std:12.1f} {fst:10.1f} {std / fst:7.2f}x")
+    configure_email_cache(0)
+
+
+if __name__ == "__main__":
+    main()
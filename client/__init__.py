@@ -0,0 +1,13 @@
+"""Python client for the enrichment API (see client.async_client for batching, deadlines and hedging)"""
+from .async_client import AsyncEnrichmentClient, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+from .errors import DeadlineExceeded, EnrichmentError
+from .sync_client import EnrichmentClient
+
+__all__ = [
+    "AsyncEnrichmentClient",
+    "EnrichmentClient",
+    "EnrichmentError",
+    "DeadlineExceeded",
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_BATCH_WINDOW",
+]
@@ -0,0 +1,303 @@
+"""
+Async client for the enrichment API.
+
+One AsyncEnrichmentClient holds one httpx connection pool (keep-alive, HTTP/2
+when the h2 package is installed) for all its calls.
+
+- enrich() calls are micro-batched: calls arriving within `batch_window`
+  seconds (up to `batch_size` of them) go out as one POST /v1/enrich/batch,
+  and each caller gets its own line of the NDJSON answer back. batch_window=0
+  sends every call to /v1/enrich on its own. A server without batching (the
+  shard router, sharded instances) answers the batch call with 501; the
+  client then sends those calls, and every later one, individually.
+- Every call takes `timeout` (seconds from now) or `deadline`
+  (time.monotonic() value). The remaining budget bounds the HTTP wait and is
+  sent as X-Deadline-Ms so the service and router can give up early too.
+- With `hedge_after` set, a request still unanswered after that many seconds
+  is sent a second time and the first successful answer wins. All endpoints
+  are read-only, so duplicates are harmless.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar, Union
+
+import httpx
+from pydantic import BaseModel
+
+from app.deadlines import DEADLINE_HEADER
+from app.models import EkataRequest, EkataResponse, EmailageRequest, EmailageResponse, EnrichRequest
+
+from .errors import DeadlineExceeded, EnrichmentError
+
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_BATCH_SIZE = 64
+
+M = TypeVar("M", bound=BaseModel)
+_Pending = Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]", Optional[float]]
+
+
+def _payload(model: Type[BaseModel], request: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    """Validate locally and serialize only the fields the caller set"""
+    if not isinstance(request, model):
+        request = model.model_validate(request)
+    return request.model_dump(mode="json", exclude_unset=True)
+
+
+def _error_detail(r: httpx.Response) -> Any:
+    try:
+        return r.json().get("detail", r.text)
+    except (ValueError, AttributeError):
+        return r.text
+
+
+class AsyncEnrichmentClient:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        *,
+        tenant: Optional[str] = None,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        http2: Optional[bool] = None,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        hedge_after: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        headers = {"content-type": "application/json"}
+        if tenant:
+            headers["x-tenant"] = tenant
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.hedge_after = hedge_after
+        self.stats = {"requests": 0, "batches": 0, "hedges": 0}
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            transport=transport,
+        )
+        self._pending: List[_Pending] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        # Cleared when the server turns out not to serve /v1/enrich/batch
+        self._batching = True
+
+    async def __aenter__(self) -> "AsyncEnrichmentClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Send any queued calls, wait for them, then close the pool"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    def _deadline(self, timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+        if timeout is not None:
+            t = time.monotonic() + timeout
+            return t if deadline is None else min(t, deadline)
+        return deadline
+
+    async def enrich(
+        self,
+        request: Union[EnrichRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """POST /v1/enrich (micro-batched unless batch_window is 0)"""
+        payload = _payload(EnrichRequest, request)
+        deadline = self._deadline(timeout, deadline)
+        if self.batch_window <= 0 or not self._batching:
+            r = await self._post("/v1/enrich", payload, deadline)
+            return r.json()
+
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future, deadline))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        if deadline is None:
+            return await future
+        try:
+            # shield: giving up on one call must not cancel the batch it rides in
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded() from None
+
+    async def enrich_many(
+        self,
+        requests: List[Union[EnrichRequest, Dict[str, Any]]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        deadline = self._deadline(timeout, deadline)
+        return list(await asyncio.gather(*(self.enrich(r, deadline=deadline) for r in requests)))
+
+    async def ekata(
+        self,
+        request: Union[EkataRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> EkataResponse:
+        """POST /v1/ekata"""
+        return await self._call_model("/v1/ekata", EkataRequest, EkataResponse, request, timeout, deadline)
+
+    async def emailage(
+        self,
+        request: Union[EmailageRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> EmailageResponse:
+        """POST /v1/emailage"""
+        return await self._call_model("/v1/emailage", EmailageRequest, EmailageResponse, request, timeout, deadline)
+
+    async def _call_model(
+        self,
+        path: str,
+        request_model: Type[BaseModel],
+        response_model: Type[M],
+        request: Union[BaseModel, Dict[str, Any]],
+        timeout: Optional[float],
+        deadline: Optional[float],
+    ) -> M:
+        r = await self._post(path, _payload(request_model, request), self._deadline(timeout, deadline))
+        return response_model.model_validate_json(r.content)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        items, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._send_batch(items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, items: List[_Pending]) -> None:
+        now = time.monotonic()
+        live: List[_Pending] = []
+        for item in items:
+            _, future, deadline = item
+            if future.done():
+                continue
+            if deadline is not None and deadline <= now:
+                future.set_exception(DeadlineExceeded())
+            else:
+                live.append(item)
+        if not live:
+            return
+
+        # The batch runs as long as its most patient caller; enrich() enforces each
+        # caller's own deadline while it waits
+        deadlines = [d for _, _, d in live]
+        batch_deadline = None if None in deadlines else max(deadlines)  # type: ignore[type-var]
+        self.stats["batches"] += 1
+        try:
+            r = await self._post("/v1/enrich/batch", [p for p, _, _ in live], batch_deadline)
+            lines = r.text.splitlines()
+        except EnrichmentError as e:
+            if e.status_code != 501:
+                self._fail(live, e)
+                return
+            self._batching = False
+            await asyncio.gather(*(self._send_one(*item) for item in live))
+            return
+        except Exception as e:
+            self._fail(live, e)
+            return
+
+        for i, (_, future, _) in enumerate(live):
+            if future.done():
+                continue
+            if i >= len(lines):
+                future.set_exception(EnrichmentError(502, "batch response ended early"))
+                continue
+            result = json.loads(lines[i])
+            if result.get("error") == "validation_error" and set(result) == {"error", "detail"}:
+                future.set_exception(EnrichmentError(422, result["detail"]))
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(items: List[_Pending], error: BaseException) -> None:
+        for _, future, _ in items:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _send_one(self, payload: Dict[str, Any], future: "asyncio.Future[Dict[str, Any]]",
+                        deadline: Optional[float]) -> None:
+        """Unbatched fallback for one queued enrich() call"""
+        try:
+            r = await self._post("/v1/enrich", payload, deadline)
+        except Exception as e:
+            self._fail([(payload, future, deadline)], e)
+            return
+        if not future.done():
+            future.set_result(r.json())
+
+    async def _post(self, path: str, body: Any, deadline: Optional[float]) -> httpx.Response:
+        if self.hedge_after is None:
+            return await self._send(path, body, deadline)
+
+        attempts = {asyncio.ensure_future(self._send(path, body, deadline))}
+        try:
+            done, attempts = await asyncio.wait(attempts, timeout=self.hedge_after)
+            if not done:
+                self.stats["hedges"] += 1
+                attempts.add(asyncio.ensure_future(self._send(path, body, deadline)))
+            error: Optional[BaseException] = None
+            while True:
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                    error = error or attempt.exception()
+                if not attempts:
+                    raise error  # type: ignore[misc]
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # The losing attempt (or both, if the caller gave up) is abandoned
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _send(self, path: str, body: Any, deadline: Optional[float]) -> httpx.Response:
+        headers: Dict[str, str] = {}
+        timeout = self.timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded()
+            headers[DEADLINE_HEADER] = str(int(remaining * 1000))
+            timeout = min(timeout, remaining)
+
+        self.stats["requests"] += 1
+        try:
+            r = await self._http.post(path, content=json.dumps(body).encode(), headers=headers, timeout=timeout)
+        except httpx.TimeoutException as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded() from e
+            raise
+        if r.status_code == 504 and deadline is not None:
+            raise DeadlineExceeded(_error_detail(r))
+        if r.status_code >= 400:
+            raise EnrichmentError(r.status_code, _error_detail(r))
+        return r
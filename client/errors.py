@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+class EnrichmentError(Exception):
+    """Non-2xx answer from the API (or an error line from a batch)"""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class DeadlineExceeded(EnrichmentError):
+    """The call's deadline passed before an answer arrived"""
+
+    def __init__(self, detail: Any = "Deadline exceeded"):
+        super().__init__(504, detail)
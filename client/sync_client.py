@@ -0,0 +1,85 @@
+"""
+Blocking client: an AsyncEnrichmentClient driven by a private event loop
+thread. Threads sharing one EnrichmentClient share its connection pool, and
+their concurrent enrich() calls are micro-batched together.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Dict, List, Optional, TypeVar, Union
+
+from app.models import EkataRequest, EkataResponse, EmailageRequest, EmailageResponse, EnrichRequest
+
+from .async_client import AsyncEnrichmentClient
+
+T = TypeVar("T")
+
+
+class EnrichmentClient:
+    """Same constructor arguments and methods as AsyncEnrichmentClient, without async/await"""
+
+    def __init__(self, base_url: str = "http://localhost:8080", **kwargs: Any):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="enrichment-client", daemon=True)
+        self._thread.start()
+
+        async def make() -> AsyncEnrichmentClient:
+            # Created on the loop thread so its pool and timers belong to that loop
+            return AsyncEnrichmentClient(base_url, **kwargs)
+
+        self._client = self._run(make())
+        self.stats = self._client.stats
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def __enter__(self) -> "EnrichmentClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def enrich(
+        self,
+        request: Union[EnrichRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return self._run(self._client.enrich(request, timeout=timeout, deadline=deadline))
+
+    def enrich_many(
+        self,
+        requests: List[Union[EnrichRequest, Dict[str, Any]]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        return self._run(self._client.enrich_many(requests, timeout=timeout, deadline=deadline))
+
+    def ekata(
+        self,
+        request: Union[EkataRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> EkataResponse:
+        return self._run(self._client.ekata(request, timeout=timeout, deadline=deadline))
+
+    def emailage(
+        self,
+        request: Union[EmailageRequest, Dict[str, Any]],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> EmailageResponse:
+        return self._run(self._client.emailage(request, timeout=timeout, deadline=deadline))
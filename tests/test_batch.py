@@ -0,0 +1,136 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.batch import BatchExecutor
+from app.dataset import DatasetStore
+from app.enrich import clock_mode, configure_clock, normalize_response
+from app.main import app, store as app_store
+from app.models import EnrichRequest
+
+app_store.load()
+client = TestClient(app)
+
+
+def _payload(i, email="vik@example.com"):
+    return {
+        "request_id": f"req_{i}",
+        "transaction_id": "tx_1001" if i % 3 == 0 else f"tx_b{i}",
+        "transaction_time": "2026-01-14T05:22:31Z",
+        "data": {"first_name": "Vishnu", "last_name": "Reddy", "email": email if i % 2 else f"u{i}@example.com"},
+    }
+
+
+@pytest.fixture
+def store():
+    previous = clock_mode()
+    configure_clock("transaction")
+    s = DatasetStore("data/sample_transactions.json")
+    s.load()
+    yield s
+    configure_clock(previous)
+
+
+def test_pool_matches_single_request_path(store):
+    payloads = [_payload(i) for i in range(40)]
+    payloads[7] = {"request_id": "bad"}
+    expected = [
+        normalize_response(EnrichRequest.model_validate(p), store.find(p["transaction_id"], p["data"]["email"]))
+        for p in payloads if "data" in p
+    ]
+
+    executor = BatchExecutor(store, workers=2, chunk_size=8)
+    try:
+        lines = [json.loads(line) for line in executor.run(payloads)]
+    finally:
+        executor.close()
+
+    assert len(lines) == 40
+    assert lines[7]["error"] == "validation_error"
+    assert [line for i, line in enumerate(lines) if i != 7] == expected
+
+
+def test_workers_catch_up_with_ingests_and_reloads(store, tmp_path):
+    executor = BatchExecutor(store, workers=2, chunk_size=2)
+    executor.start()
+    pids = {w.process.pid for w in executor._current}
+    payloads = [dict(_payload(1), transaction_id="tx_fresh", data={
+        "first_name": "F", "last_name": "R", "email": "fresh@example.com"})] * 6
+    try:
+        assert [json.loads(line)["dataset_hit"] for line in executor.run(payloads)] == [False] * 6
+        store.ingest({"transaction": {"transaction_id": "tx_fresh"}, "customer": {"email": "fresh@example.com"}})
+        assert [json.loads(line)["dataset_hit"] for line in executor.run(payloads)] == [True] * 6
+        # Ingests are shipped to the running workers rather than re-forking them
+        assert {w.process.pid for w in executor._current} == pids
+        # Both workers caught up, so the journal was trimmed
+        assert store._ingest_journal == []
+
+        # A reload replaces the workers with new ones that load the files themselves
+        store.dataset_path = str(tmp_path / "empty.json")
+        store.load()
+        assert [json.loads(line)["dataset_hit"] for line in executor.run(payloads)] == [False] * 6
+        assert not pids & {w.process.pid for w in executor._current}
+    finally:
+        executor.close()
+
+
+def test_batch_endpoint_streams_ndjson():
+    r = client.post("/v1/enrich/batch", json=[_payload(0), {"request_id": "x"}, _payload(1)])
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line.get("request_id") for line in lines] == ["req_0", None, "req_1"]
+    assert lines[0]["dataset_hit"] is True
+    assert lines[1]["error"] == "validation_error"
+
+
+def test_spawned_worker_loads_log_and_shard_slice(tmp_path):
+    import pickle
+
+    from app import batch
+    from app.sharding import HashRing
+
+    ring = HashRing(["a", "b"])
+    owned = [t for t in (f"tx_s{i}" for i in range(20)) if ring.node_for(t) == "a"]
+    foreign = next(t for t in (f"tx_s{i}" for i in range(20)) if ring.node_for(t) == "b")
+    log = tmp_path / "ingest.ndjson"
+    log.write_text("".join(json.dumps({"transaction": {"transaction_id": t}}) + "\n" for t in (owned[0], foreign)))
+
+    shard_filter = pickle.loads(pickle.dumps(ring.owns("a")))
+    batch._init_worker(str(tmp_path / "missing.json"), False, False, str(log), shard_filter)
+    try:
+        assert set(batch._worker_store.by_txid) == {owned[0]}
+    finally:
+        batch._worker_store = None
+
+
+def test_batch_endpoint_refused_in_sharded_mode(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "SHARDS", ["shard-0", "shard-1"])
+    r = client.post("/v1/enrich/batch", json=[_payload(0)])
+    assert r.status_code == 501
+
+
+def test_capped_journal_reseeds_lagging_followers(tmp_path):
+    store = DatasetStore(str(tmp_path / "missing.json"))
+    store.load()
+    position = store.track_ingests(limit=2)
+    rows = [{"transaction": {"transaction_id": f"tx_j{i}"}} for i in range(3)]
+    store.ingest_many(rows[:1])
+    assert [r["transaction"]["transaction_id"] for r in store.ingested_since(position)[0]] == ["tx_j0"]
+
+    store.ingest_many(rows[1:])
+    # Past the limit the journal is dropped; a follower behind it gets every row since load
+    caught_up, end = store.ingested_since(1)
+    assert [r["transaction"]["transaction_id"] for r in caught_up] == ["tx_j0", "tx_j1", "tx_j2"]
+    assert end == 3 and store.ingested_since(end)[0] == []
+
+
+def test_tenant_batches_refused_with_worker_pool(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "BATCH_WORKERS", 4)
+    r = client.post("/v1/enrich/batch", json=[_payload(0)], headers={"X-Tenant": "acme"})
+    assert r.status_code == 501
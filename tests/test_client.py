@@ -0,0 +1,190 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.enrich import configure_clock
+from app.main import app, store
+from app.models import EkataResponse, EmailageResponse, EnrichRequest
+from client import AsyncEnrichmentClient, DeadlineExceeded, EnrichmentClient, EnrichmentError
+
+store.load()
+
+
+def _payload(i):
+    return {
+        "request_id": f"req_c{i}",
+        "transaction_id": "tx_1001" if i % 2 else f"tx_c{i}",
+        "transaction_time": "2026-01-14T05:22:31Z",
+        "data": {"first_name": "Vishnu", "last_name": "Reddy", "email": f"c{i}@example.com"},
+    }
+
+
+SERVICE = {"request_id": "req_c_svc", "data": {"first_name": "Bob", "last_name": "Jones", "email": "bob@test.com"}}
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    """ASGI transport that takes `delay` seconds per request and honours the read timeout"""
+
+    def __init__(self, delay):
+        self.inner = httpx.ASGITransport(app=app)
+        self.delay = delay
+
+    async def handle_async_request(self, request):
+        timeout = request.extensions.get("timeout", {}).get("read")
+        if timeout is not None and timeout < self.delay:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("timed out", request=request)
+        await asyncio.sleep(self.delay)
+        return await self.inner.handle_async_request(request)
+
+
+class SlowFirstTransport(httpx.AsyncBaseTransport):
+    """ASGI transport whose first request stalls, to exercise hedging and deadlines"""
+
+    def __init__(self, delay):
+        self.inner = httpx.ASGITransport(app=app)
+        self.delay = delay
+        self.calls = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(self.delay)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock():
+    configure_clock("fixed", "2026-01-15T00:00:00Z")
+    yield
+    configure_clock("wall")
+
+
+def _client(**kwargs):
+    kwargs.setdefault("transport", httpx.ASGITransport(app=app))
+    return AsyncEnrichmentClient("http://test", **kwargs)
+
+
+def test_enrich_calls_are_micro_batched():
+    payloads = [_payload(i) for i in range(10)]
+    expected = [TestClient(app).post("/v1/enrich", json=p).json() for p in payloads]
+
+    async def run():
+        async with _client(batch_window=0.01) as c:
+            results = await c.enrich_many(payloads)
+            single = await c.enrich(EnrichRequest.model_validate(payloads[0]))
+            return results, single, dict(c.stats)
+
+    results, single, stats = asyncio.run(run())
+    assert results == expected
+    assert single == expected[0]
+    assert stats["batches"] == 2 and stats["requests"] == 2
+
+
+def test_unbatched_and_service_calls():
+    async def run():
+        async with _client(batch_window=0) as c:
+            return await c.enrich(_payload(1)), await c.ekata(SERVICE), await c.emailage(SERVICE), c.stats["batches"]
+
+    enriched, ekata, emailage, batches = asyncio.run(run())
+    assert enriched["dataset_hit"] is True
+    assert isinstance(ekata, EkataResponse) and ekata.data.fname == "Bob"
+    assert isinstance(emailage, EmailageResponse) and emailage.request_id == "req_c_svc"
+    assert batches == 0
+
+
+def test_errors():
+    async def run():
+        async with _client(tenant="no-such-tenant") as c:
+            with pytest.raises(EnrichmentError) as e:
+                await c.enrich(_payload(1))
+            assert e.value.status_code == 404
+            with pytest.raises(ValidationError):
+                await c.ekata({"request_id": "x", "data": {"first_name": "a", "last_name": "b", "email": "nope"}})
+
+    asyncio.run(run())
+
+
+def test_deadlines():
+    # The service refuses work whose budget is already spent
+    r = TestClient(app).post("/v1/ekata", json=SERVICE, headers={"x-deadline-ms": "0"})
+    assert r.status_code == 504
+
+    async def run():
+        async with _client(transport=SlowFirstTransport(0.5)) as c:
+            with pytest.raises(DeadlineExceeded):
+                await c.enrich(_payload(1), timeout=0.05)
+            with pytest.raises(DeadlineExceeded):
+                await c.ekata(SERVICE, timeout=0)
+            return await c.ekata(SERVICE, timeout=5)
+
+    assert asyncio.run(run()).request_id == "req_c_svc"
+
+
+def test_short_deadline_does_not_fail_its_batch_mates():
+    async def run():
+        async with _client(transport=SlowTransport(0.2), batch_window=0.01) as c:
+            return await asyncio.gather(
+                c.enrich(_payload(1), timeout=0.05), c.enrich(_payload(2)), c.enrich(_payload(3), timeout=5),
+                return_exceptions=True,
+            ), c.stats["batches"]
+
+    (short, unbounded, long), batches = asyncio.run(run())
+    assert batches == 1
+    assert isinstance(short, DeadlineExceeded)
+    assert unbounded["transaction_payload"]["transaction"]["transaction_id"] == "tx_c2"
+    assert long["dataset_hit"] is True
+
+
+def test_hedged_request_wins_over_slow_first_attempt():
+    async def run():
+        transport = SlowFirstTransport(2.0)
+        async with _client(transport=transport, hedge_after=0.05) as c:
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            result = await c.ekata(SERVICE)
+            return result, loop.time() - t0, dict(c.stats)
+
+    result, elapsed, stats = asyncio.run(run())
+    assert result.request_id == "req_c_svc"
+    assert elapsed < 1.0
+    assert stats["hedges"] == 1 and stats["requests"] == 2
+
+
+def test_sync_client_shares_batches_across_threads():
+    expected = [TestClient(app).post("/v1/enrich", json=_payload(i)).json() for i in range(6)]
+    results = {}
+    # A window no test run outlasts: the batch goes out when the sixth call fills it
+    with EnrichmentClient("http://test", transport=httpx.ASGITransport(app=app), batch_window=60,
+                          batch_size=6) as c:
+        threads = [threading.Thread(target=lambda i=i: results.update({i: c.enrich(_payload(i))})) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert c.ekata(SERVICE).data.l_name == "Jones"
+        assert c.stats["batches"] == 1
+    assert [results[i] for i in range(6)] == expected
+
+
+def test_batches_fall_back_to_single_calls_on_501(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "SHARDS", ["shard-0", "shard-1"])
+    payloads = [_payload(i) for i in range(4)]
+
+    async def run():
+        async with _client(batch_window=0.01) as c:
+            first = await c.enrich_many(payloads[:2])
+            later = await c.enrich(payloads[2])
+            return first, later, dict(c.stats)
+
+    first, later, stats = asyncio.run(run())
+    assert [r["request_id"] for r in first] == ["req_c0", "req_c1"]
+    assert later["request_id"] == "req_c2"
+    # One refused batch, then every call on its own
+    assert stats["batches"] == 1 and stats["requests"] == 4
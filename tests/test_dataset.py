@@ -0,0 +1,298 @@
+import json
+import sys
+
+import pytest
+
+from app.compact import Shape, decode, encode, lookup
+from app.dataset import DatasetStore, _deep_size, decode_cursor, encode_cursor, parse_transaction_time
+
+SAMPLE = "data/sample_transactions.json"
+
+
+def test_compact_round_trip():
+    with open(SAMPLE, encoding="utf-8") as f:
+        rows = json.load(f)
+    for row in rows:
+        packed = encode(row)
+        assert isinstance(packed[0], Shape)
+        assert decode(packed) == row
+        assert lookup(packed, "transaction", "amounts", "currency") == "USD"
+        assert lookup(packed, "transaction", "missing") is None
+
+
+def test_compact_shares_shapes_and_strings():
+    a = encode({"status": "".join(["Comp", "leted"]), "amount": 1})
+    b = encode({"status": "".join(["Comp", "leted"]), "amount": 2})
+    assert a[0] is b[0]
+    assert a[1] is b[1]
+
+
+def test_compact_store_matches_plain_store():
+    plain = DatasetStore(SAMPLE)
+    compact = DatasetStore(SAMPLE, compact=True)
+    plain.load()
+    compact.load()
+    assert compact.find("tx_1001", "") == plain.find("tx_1001", "")
+    assert compact.find("tx_missing", "VIK@example.com") == plain.find("tx_1001", "")
+    assert compact.find("tx_missing", "nobody@example.com") is None
+
+
+def _row(txid, email, when):
+    return {"transaction": {"transaction_id": txid, "transaction_time": when}, "customer": {"email": email}}
+
+
+def test_estimate_counts_match_index_contents(tmp_path):
+    dataset = tmp_path / "rows.json"
+    rows = [_row(f"tx_{i}", f"user{i}@x.com", "2026-01-01T00:00:00Z") for i in range(500)]
+    for i, row in enumerate(rows):
+        row["customer"].update(first_name=f"First{i}", last_name="Last", phone=f"555-01{i:04d}")
+    dataset.write_text(json.dumps(rows))
+    with_matches, without = DatasetStore(str(dataset)), DatasetStore(str(dataset), matching=False)
+    with_matches.load()
+    without.load()
+
+    m = with_matches.matches
+    held = sum(sys.getsizeof(d) + sum(_deep_size(k) + _deep_size(v) for k, v in d.items())
+               for d in (m.by_email, m.by_phone, m.by_address, m._refs))
+    assert with_matches.estimate_bytes() - without.estimate_bytes() >= held * 0.9
+
+
+def test_ingest_keeps_email_recency_order(tmp_path):
+    store = DatasetStore(str(tmp_path / "missing.json"))
+    store.load()
+    assert store.ingest(_row("tx_b", "a@x.com", "2026-01-02T00:00:00Z"))
+    assert store.ingest(_row("tx_c", "a@x.com", "2026-01-03T00:00:00Z"))
+    # Older row arriving late does not become the latest
+    assert store.ingest(_row("tx_a", "a@x.com", "2026-01-01T00:00:00Z"))
+    assert store.email_index["a@x.com"] == ["tx_a", "tx_b", "tx_c"]
+    assert store.find("tx_unknown", "A@x.com")["transaction"]["transaction_id"] == "tx_c"
+
+    # Re-ingesting a txid moves it to its new email and time
+    store.ingest(_row("tx_c", "b@x.com", "2026-01-04T00:00:00Z"))
+    assert store.email_index["a@x.com"] == ["tx_a", "tx_b"]
+    assert store.find("tx_unknown", "b@x.com")["transaction"]["transaction_id"] == "tx_c"
+
+    assert store.ingest_many([{"transaction": {}}, {"customer": {}}]) == 0
+
+
+def test_ingest_log_replay_and_compaction(tmp_path):
+    dataset = tmp_path / "rows.json"
+    dataset.write_text(json.dumps([_row("tx_1", "a@x.com", "2026-01-01T00:00:00Z")]))
+    log = tmp_path / "ingest.ndjson"
+
+    store = DatasetStore(str(dataset), log_path=str(log), compact=True)
+    store.load()
+    assert store.ingest_many([
+        _row("tx_2", "a@x.com", "2026-01-05T00:00:00Z"),
+        _row("tx_1", "a@x.com", "2026-01-06T00:00:00Z"),
+    ]) == 2
+    with open(log, "a") as f:
+        f.write('{"transaction": {"transac')  # torn write
+
+    replayed = DatasetStore(str(dataset), log_path=str(log))
+    replayed.load()
+    assert replayed.pending_log_entries == 2
+    assert replayed.find("tx_x", "a@x.com")["transaction"]["transaction_id"] == "tx_1"
+
+    assert store.compact_log() == 2
+    assert not log.exists()
+    rows = json.loads(dataset.read_text())
+    assert [r["transaction"]["transaction_id"] for r in rows] == ["tx_1", "tx_2"]
+    assert rows[0]["transaction"]["transaction_time"] == "2026-01-06T00:00:00Z"
+
+    reloaded = DatasetStore(str(dataset), log_path=str(log))
+    reloaded.load()
+    assert reloaded.pending_log_entries == 0
+    assert reloaded.email_index["a@x.com"] == ["tx_2", "tx_1"]
+    assert store.compact_log() == 0
+
+
+def test_malformed_rows_are_rejected_before_logging(tmp_path):
+    dataset = tmp_path / "rows.json"
+    dataset.write_text(json.dumps([_row("tx_1", "a@x.com", "2026-01-01T00:00:00Z")]))
+    log = tmp_path / "ingest.ndjson"
+    # A bad line left by an older build must not break replay or compaction
+    log.write_text('{"transaction":{"transaction_id":"tx_old"},"customer":null}\n')
+    store = DatasetStore(str(dataset), log_path=str(log))
+    store.load()
+    version, view = store.version, store._view
+
+    bad = [
+        {"transaction": {"transaction_id": "tx_x"}, "customer": None},
+        {"transaction": "tx_x"},
+        {"transaction": {"transaction_id": "tx_x"}, "customer": {"email": 5}},
+        {"transaction": {"transaction_id": "tx_x"}, "customer": {"addresses": {"billing": []}}},
+    ]
+    assert store.ingest_many(bad) == 0
+    assert store.ingest_many([bad[0], _row("tx_2", "a@x.com", "2026-01-02T00:00:00Z")]) == 1
+    assert store.version == version + 1 and store._new_times == []
+    assert "tx_x" not in store.by_txid and view[0] is store.by_txid
+    assert "tx_x" not in log.read_text()
+
+    store.load()
+    assert sorted(store.by_txid) == ["tx_1", "tx_2"]
+    assert store.skipped_rows == 1
+    assert store.compact_log() == 1
+    assert [r["transaction"]["transaction_id"] for r in json.loads(dataset.read_text())] == ["tx_1", "tx_2"]
+
+
+def test_compaction_streams_rows_and_keeps_unreadable_ones(tmp_path):
+    dataset = tmp_path / "rows.json"
+    base = [_row("tx_1", "a@x.com", "2026-01-01T00:00:00Z"), {"note": "no transaction"},
+            _row("tx_2", "a@x.com", "2026-01-02T00:00:00Z")]
+    dataset.write_text(json.dumps(base, indent=2))
+    log = tmp_path / "ingest.ndjson"
+    store = DatasetStore(str(dataset), log_path=str(log))
+    store.load()
+    assert store.skipped_rows == 1
+
+    store.ingest_many([_row("tx_2", "b@x.com", "2026-01-02T00:00:00Z"), _row("tx_3", "a@x.com", "2026-01-03T00:00:00Z")])
+    assert store.compact_log() == 2
+    lines = dataset.read_text().splitlines()
+    # One compact row per line; the unreadable row is kept in place, tx_2 is replaced where it was
+    assert lines[0] == "[" and lines[-1] == "]" and len(lines) == 6
+    assert json.loads(dataset.read_text()) == [base[0], base[1], _row("tx_2", "b@x.com", "2026-01-02T00:00:00Z"),
+                                              _row("tx_3", "a@x.com", "2026-01-03T00:00:00Z")]
+
+
+def test_replaying_a_hot_email_keeps_time_order(tmp_path):
+    log = tmp_path / "ingest.ndjson"
+    times = [f"2026-01-{1 + (i * 7) % 28:02d}T00:00:00Z" for i in range(200)]
+    log.write_text("".join(json.dumps(_row(f"tx_{i}", "hot@x.com", t)) + "\n" for i, t in enumerate(times)))
+    store = DatasetStore(str(tmp_path / "missing.json"), log_path=str(log))
+    store.load()
+    txids = store.email_index["hot@x.com"]
+    assert len(txids) == 200
+    assert [store._time(t) for t in txids] == sorted(store._time(t) for t in txids)
+    # Among equal times the earliest logged row stays the most recent, as with one-by-one inserts
+    assert txids[-1] == "tx_3"
+
+
+def _export_ids(store, **filters):
+    ids, after = [], None
+    while True:
+        rows, after = store.export(after, 2, **filters)
+        ids += [r["transaction"]["transaction_id"] for r in rows]
+        if after is None:
+            return ids
+
+
+def test_export_pages_filters_and_ingest(tmp_path):
+    dataset = tmp_path / "rows.json"
+    rows = [_row(f"tx_{i}", "a@x.com" if i % 2 else "b@x.com", f"2026-01-0{i}T00:00:00Z") for i in range(1, 6)]
+    rows[2]["transaction"]["merchant"] = {"merchant_id": "M1"}
+    dataset.write_text(json.dumps(rows))
+    store = DatasetStore(str(dataset), compact=True)
+    store.load()
+
+    assert _export_ids(store) == ["tx_1", "tx_2", "tx_3", "tx_4", "tx_5"]
+    assert _export_ids(store, email="A@x.com") == ["tx_1", "tx_3", "tx_5"]
+    assert _export_ids(store, merchant_id="M1") == ["tx_3"]
+    since = parse_transaction_time("2026-01-02T00:00:00Z")
+    until = parse_transaction_time("2026-01-04T00:00:00Z")
+    assert _export_ids(store, since=since, until=until) == ["tx_2", "tx_3", "tx_4"]
+
+    # A cursor taken before an ingest still resumes at the same position
+    page, after = store.export(None, 2)
+    assert [r["transaction"]["transaction_id"] for r in page] == ["tx_1", "tx_2"]
+    store.ingest_many([_row("tx_0", "c@x.com", "2025-12-31T00:00:00Z"), _row("tx_6", "c@x.com", "2026-01-06T00:00:00Z")])
+    store.ingest(_row("tx_3", "a@x.com", "2026-01-07T00:00:00Z"))  # moves to the end
+    resumed, _ = store.export(decode_cursor(encode_cursor(after)), 10)
+    assert [r["transaction"]["transaction_id"] for r in resumed] == ["tx_4", "tx_5", "tx_6", "tx_3"]
+    assert _export_ids(store)[:2] == ["tx_0", "tx_1"]
+
+
+def test_export_page_survives_reload(tmp_path):
+    dataset = tmp_path / "rows.json"
+    dataset.write_text(json.dumps([_row(f"tx_{i}", "a@x.com", f"2026-01-0{i}T00:00:00Z") for i in range(1, 4)]))
+    store = DatasetStore(str(dataset))
+    store.load()
+    rows, _ = store.export(None, 10)
+
+    dataset.write_text(json.dumps([_row("tx_9", "z@x.com", "2026-01-09T00:00:00Z")]))
+    store.load()
+    # The page in flight keeps the rows it started with; the next one sees the reload
+    assert [r["transaction"]["transaction_id"] for r in rows] == ["tx_1", "tx_2", "tx_3"]
+    assert _export_ids(store) == ["tx_9"]
+
+
+def test_reload_keeps_match_index_until_publish(tmp_path, monkeypatch):
+    dataset = tmp_path / "rows.json"
+    row = _row("tx_1", "a@x.com", "2026-01-01T00:00:00Z")
+    row["customer"]["first_name"] = "Ann"
+    dataset.write_text(json.dumps([row]))
+    store = DatasetStore(str(dataset))
+    store.load()
+    matches = store.matches
+
+    row = _row("tx_2", "b@x.com", "2026-01-02T00:00:00Z")
+    row["customer"]["first_name"] = "Bo"
+    dataset.write_text(json.dumps([row]))
+    seen_during_build = []
+    build = DatasetStore._build
+
+    def observing_build(staged):
+        build(staged)
+        seen_during_build.append(set(matches.by_email))
+
+    monkeypatch.setattr(DatasetStore, "_build", observing_build)
+    store.load()
+    assert seen_during_build == [{"a@x.com"}]
+    assert store.matches is matches and set(matches.by_email) == {"b@x.com"}
+
+
+def test_export_scan_budget_resumes_selective_filters(tmp_path):
+    dataset = tmp_path / "rows.json"
+    rows = [_row(f"tx_{i:02d}", "a@x.com", f"2026-01-{1 + i:02d}T00:00:00Z") for i in range(20)]
+    for i in (3, 17):
+        rows[i]["transaction"]["merchant"] = {"merchant_id": "M1"}
+    dataset.write_text(json.dumps(rows))
+    store = DatasetStore(str(dataset))
+    store.load()
+
+    pages, after = [], None
+    while True:
+        page, after = store.export(after, 10, merchant_id="M1", scan_limit=5)
+        pages.append([r["transaction"]["transaction_id"] for r in page])
+        if after is None:
+            break
+    assert pages == [["tx_03"], [], [], ["tx_17"]]
+
+
+def test_compaction_purges_stale_time_entries(tmp_path):
+    dataset = tmp_path / "rows.json"
+    dataset.write_text(json.dumps([_row("tx_1", "a@x.com", "2026-01-01T00:00:00Z")]))
+    store = DatasetStore(str(dataset), log_path=str(tmp_path / "ingest.ndjson"))
+    store.load()
+    store.ingest(_row("tx_1", "a@x.com", "2026-01-05T00:00:00Z"))
+    _, _, loaded, ingested = store._view
+    assert len(loaded) + len(ingested) == 2
+
+    store.compact_log()
+    _, _, loaded, ingested = store._view
+    assert loaded + ingested == [(store._time("tx_1"), "tx_1")]
+    assert _export_ids(store) == ["tx_1"]
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_compact_shape_registry_is_bounded():
+    from app import compact
+    saved = dict(compact._shapes), compact._max_shapes, compact._unshared
+    try:
+        compact._shapes.clear()
+        compact.configure_shapes(2)
+        rows = [{f"opt_{i}": i, "status": "ok"} for i in range(5)]
+        packed = [encode(r) for r in rows]
+        assert [decode(p) for p in packed] == rows
+        assert compact.shape_stats() == {"size": 2, "maxsize": 2, "unshared": saved[2] + 3}
+        assert encode(rows[0])[0] is packed[0][0]
+        assert encode(rows[4])[0] is not packed[4][0]
+    finally:
+        compact._shapes.clear()
+        compact._shapes.update(saved[0])
+        compact.configure_shapes(saved[1])
+        compact._unshared = saved[2]
@@ -1,6 +1,9 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app, store
+from app.enrich import clock_epoch, configure_clock
 
 # Manually load the dataset for tests
 store.load()
@@ -284,3 +287,110 @@ def test_emailage_service_invalid_email():
     }
     r = client.post("/v1/emailage", json=payload)
     assert r.status_code == 422
+
+
+def test_clock_mode_transaction_is_reproducible():
+    """Mock Emailage dates anchor to transaction_time in transaction clock mode"""
+
+    payload = {
+        "request_id": "req_clock",
+        "transaction_id": "tx_clock_1",
+        "transaction_time": "2026-01-14T05:22:31Z",
+        "data": {
+            "first_name": "Test",
+            "last_name": "User",
+            "email": "clock@example.com",
+            "ip": "192.168.1.1"
+        }
+    }
+    configure_clock("transaction")
+    try:
+        first = client.post("/v1/enrich", json=payload).json()
+        second = client.post("/v1/enrich", json=payload).json()
+    finally:
+        configure_clock("wall")
+
+    assert first == second
+    emailage = first["transaction_payload"]["external_services"]["emailage"]
+    assert emailage["email_last_seen"] <= "2026-01-14T05:22:31+00:00"
+
+
+def test_clock_mode_fixed_epoch():
+    """Simplified Emailage dates anchor to the configured epoch in fixed clock mode"""
+
+    payload = {
+        "request_id": "req_clock_fixed",
+        "data": {
+            "first_name": "Alice",
+            "last_name": "Williams",
+            "email": "alice@test.com"
+        }
+    }
+    configure_clock("fixed", "2020-06-01T00:00:00Z")
+    try:
+        body = client.post("/v1/emailage", json=payload).json()
+    finally:
+        configure_clock("wall")
+
+    assert body["emailage_payload"]["email_last_seen"] <= "2020-06-01T00:00:00+00:00"
+    assert body["emailage_payload"]["email_last_seen"].endswith("T00:00:00+00:00")
+
+
+def test_clock_epoch_defaults_when_omitted():
+    configure_clock("fixed", "2020-06-01T00:00:00Z")
+    configure_clock("fixed")
+    try:
+        assert clock_epoch() == "2026-01-01T00:00:00+00:00"
+    finally:
+        configure_clock("wall")
+
+
+def test_clock_mode_invalid():
+
+    with pytest.raises(ValueError):
+        configure_clock("sundial")
+
+
+def test_ingest_then_email_fallback():
+    row = {
+        "transaction": {"transaction_id": "tx_ingest_1", "transaction_time": "2026-02-01T00:00:00Z"},
+        "customer": {"email": "ingested@example.com"},
+    }
+    r = client.post("/v1/ingest", json=row)
+    assert r.status_code == 200
+    assert r.json()["ingested"] == 1
+
+    r = client.post("/v1/ingest/bulk", json=[{"transaction": {}}])
+    assert r.json() == {"ingested": 0, "skipped": 1, "dataset_count": len(store.by_txid)}
+    assert client.post("/v1/ingest", json={"customer": {}}).status_code == 422
+    bad = {"transaction": {"transaction_id": "tx_bad"}, "customer": None}
+    assert client.post("/v1/ingest", json=bad).status_code == 422
+
+    payload = {
+        "request_id": "req_ingest",
+        "transaction_id": "tx_new",
+        "transaction_time": "2026-02-02T00:00:00Z",
+        "data": {"first_name": "In", "last_name": "Gest", "email": "ingested@example.com"}
+    }
+    body = client.post("/v1/enrich", json=payload).json()
+    assert body["dataset_hit"] is True
+
+
+def test_export_endpoint():
+    r = client.get("/v1/export", params={"limit": 1})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    first = [json.loads(line) for line in r.text.splitlines()]
+    assert len(first) == 1
+    cursor = r.headers["x-next-cursor"]
+
+    rest = client.get("/v1/export", params={"cursor": cursor, "limit": 10000})
+    ids = [json.loads(line)["transaction"]["transaction_id"] for line in rest.text.splitlines()]
+    assert first[0]["transaction"]["transaction_id"] not in ids
+    assert len(ids) + 1 == len(store.by_txid)
+    assert "x-next-cursor" not in rest.headers
+
+    r = client.get("/v1/export", params={"merchant_id": "M12345", "since": "2026-01-10T00:00:00Z"})
+    assert [json.loads(line)["transaction"]["transaction_id"] for line in r.text.splitlines()] == ["tx_1001"]
+    assert client.get("/v1/export", params={"cursor": "bogus"}).status_code == 400
+    assert client.get("/v1/export", params={"limit": 0}).status_code == 422
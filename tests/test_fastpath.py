@@ -0,0 +1,101 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.emails import configure_email_cache, email_cache_stats
+from app.enrich import configure_clock
+from app.fastpath import FastValidationRoute
+from app.main import app, store
+
+store.load()
+
+
+def _fast_app() -> FastAPI:
+    fast = FastAPI()
+    fast.router.route_class = FastValidationRoute
+    for r in app.routes:
+        if isinstance(r, APIRoute):
+            fast.add_api_route(r.path, r.endpoint, methods=list(r.methods))
+    return fast
+
+
+standard = TestClient(app)
+fast = TestClient(_fast_app())
+
+ENRICH = {
+    "request_id": "req_fast",
+    "transaction_id": "tx_1001",
+    "transaction_time": "2026-01-14T05:22:31Z",
+    "data": {
+        "first_name": "Vishnu",
+        "last_name": "Reddy",
+        "email": "Vik@Example.com",
+        "ip": "73.14.55.10",
+        "billing_address": {"line1": "1 Main St", "city": "hyd"},
+    },
+    "payment": {"amount": 10.5, "card": {"bin": "411111", "last4": "1111"}},
+}
+SERVICE = {"request_id": "req_fast_svc", "data": {"first_name": "Bob", "last_name": "Jones", "email": "bob@test.com"}}
+
+BAD_BODIES = [
+    b"",
+    b"{",
+    b"[1, 2]",
+    b'{"request_id": "r"}',
+    b'{"request_id": "r", "transaction_id": "t", "transaction_time": "yesterday", '
+    b'"data": {"first_name": "a", "last_name": "b", "email": "not-an-email"}, "payment": {"card": {"bin": "1"}}}',
+]
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock():
+    configure_clock("fixed", "2026-01-15T00:00:00Z")
+    yield
+    configure_clock("wall")
+
+
+@pytest.mark.parametrize("path", ["/v1/enrich", "/v1/enrich/emailage", "/v1/enrich/ekata"])
+def test_fast_path_matches_standard_enrich(path):
+    a = standard.post(path, json=ENRICH)
+    b = fast.post(path, json=ENRICH)
+    assert a.status_code == b.status_code == 200
+    assert a.json() == b.json()
+
+
+@pytest.mark.parametrize("path", ["/v1/ekata", "/v1/emailage"])
+def test_fast_path_matches_standard_service(path):
+    a = standard.post(path, json=SERVICE)
+    b = fast.post(path, json=SERVICE)
+    assert a.status_code == b.status_code == 200
+    assert a.json() == b.json()
+
+
+@pytest.mark.parametrize("body", BAD_BODIES)
+@pytest.mark.parametrize("path", ["/v1/enrich", "/v1/ekata"])
+def test_fast_path_errors_match_standard(path, body):
+    headers = {"content-type": "application/json"}
+    a = standard.post(path, content=body, headers=headers)
+    b = fast.post(path, content=body, headers=headers)
+    assert a.status_code == b.status_code == 422
+    assert a.json() == b.json()
+
+
+def test_fast_path_headers_and_content_type():
+    a = fast.post("/v1/enrich", json=ENRICH, headers={"x-tenant": "nope"})
+    assert a.status_code == 404
+    b = fast.post("/v1/enrich", content=b"{}", headers={"content-type": "text/plain"})
+    assert b.status_code == standard.post("/v1/enrich", content=b"{}", headers={"content-type": "text/plain"}).status_code
+
+
+def test_email_cache():
+    configure_email_cache(16)
+    try:
+        for _ in range(3):
+            assert fast.post("/v1/ekata", json=SERVICE).status_code == 200
+        assert fast.post("/v1/ekata", json={**SERVICE, "data": {**SERVICE["data"], "email": "bad"}}).status_code == 422
+        stats = email_cache_stats()
+        assert stats["hits"] >= 2 and stats["size"] == 1
+    finally:
+        configure_email_cache(0)
+    assert email_cache_stats() is None
@@ -0,0 +1,68 @@
+import io
+import json
+
+from app import enrich
+from app.dataset import DatasetStore
+from app.generate import GeneratorConfig, generate
+from app.models import EnrichRequest
+
+
+def _cfg(rows=300, zipf=1.1):
+    return GeneratorConfig(seed="t", rows=rows, emails=50, zipf=zipf, start="2025-01-01T00:00:00Z", span_days=30)
+
+
+def _render(fmt, workers=1, chunk_size=64, **kw):
+    out = io.StringIO()
+    generate(_cfg(**kw), fmt, out, workers=workers, chunk_size=chunk_size)
+    return out.getvalue()
+
+
+def test_output_is_deterministic_across_workers():
+    assert _render("json") == _render("json", workers=2, chunk_size=50)
+    assert _render("ndjson") == _render("ndjson", workers=2)
+
+
+def test_output_ignores_configured_match_index(tmp_path):
+    expected = _render("json")
+    path = tmp_path / "rows.json"
+    path.write_text(expected)
+    store = DatasetStore(str(path))
+    store.load()
+
+    previous = enrich._match_index
+    enrich.configure_matching(store.matches)
+    try:
+        assert _render("json") == expected
+        assert _render("json", workers=2) == expected
+    finally:
+        enrich.configure_matching(previous)
+
+
+def test_rows_load_and_requests_replay(tmp_path):
+    path = tmp_path / "rows.json"
+    path.write_text(_render("json"))
+    store = DatasetStore(str(path))
+    store.load()
+    assert len(store.by_txid) == 300
+
+    rows = json.loads(path.read_text())
+    assert set(rows[0]) == {"transaction", "customer", "external_services", "features"}
+    assert set(rows[0]["external_services"]) == {"emailage", "threatmetrix", "ekata"}
+
+    lines = _render("requests").splitlines()
+    assert len(lines) == 300
+    for line in lines:
+        req = EnrichRequest.model_validate_json(line)
+        row = store.find(req.transaction_id, str(req.data.email))
+        assert row["customer"]["email"] == req.data.email
+
+
+def test_zipf_skews_email_reuse():
+    def top_share(zipf):
+        rows = [json.loads(line) for line in _render("ndjson", rows=2000, zipf=zipf).splitlines()]
+        counts = {}
+        for r in rows:
+            counts[r["customer"]["email"]] = counts.get(r["customer"]["email"], 0) + 1
+        return max(counts.values()) / len(rows)
+
+    assert top_share(1.5) > 3 * top_share(0.0)
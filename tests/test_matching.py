@@ -0,0 +1,94 @@
+from app import enrich
+from app.dataset import DatasetStore
+from app.enrich import build_mock_ekata, configure_matching, enrich_ekata_service
+from app.matching import MatchIndex, normalize_address, normalize_phone, similarity
+from app.models import EkataRequest, EnrichRequest
+
+CUSTOMER = {
+    "first_name": "José",
+    "last_name": "Reddy",
+    "email": "Jose@Example.com",
+    "phone": "+1 (555) 010-1234",
+    "addresses": {"billing": {"line1": "1 Main Street", "zip": "50044-1234"}},
+}
+
+
+def test_normalizers():
+    assert normalize_phone("+1-555-010-1234") == normalize_phone("(555) 0101234")
+    assert normalize_address("1 Main Street", "50044") == normalize_address("1 main st.", "50044-9999")
+    assert normalize_address(None, "50044") == ""
+    assert similarity("jose reddy", "jose reddy") == 1.0
+    assert similarity("jose reddy", "josee reddy") > 0.85 > similarity("jose reddy", "mary smith")
+
+
+def test_match_flags_from_index():
+    index = MatchIndex()
+    index.add(CUSTOMER)
+
+    found = index.match("Jose", "REDDY", "jose@example.com", "555-010-1234", "1 Main St", "50044")
+    assert found == {
+        "email_to_name_match": True,
+        "phone_to_name_match": True,
+        "address_to_name_match": True,
+        "first_name_match": True,
+        "last_name_match": True,
+        "name_similarity": 100,
+    }
+
+    found = index.match("Mary", "Reddy", "jose@example.com", "+1-999-000-0000")
+    assert found["email_to_name_match"] is False
+    assert found["phone_to_name_match"] is None
+    assert found["address_to_name_match"] is None
+    assert found["first_name_match"] is False
+    assert found["last_name_match"] is True
+
+    assert index.match("A", "B", "nobody@example.com")["name_similarity"] is None
+
+
+def test_ekata_uses_dataset_customers():
+    store = DatasetStore("data/sample_transactions.json")
+    store.load()
+    previous = enrich._match_index
+    configure_matching(store.matches)
+    try:
+        req = EnrichRequest.model_validate({
+            "request_id": "req_m",
+            "transaction_id": "tx_unknown",
+            "transaction_time": "2026-01-14T05:22:31Z",
+            "data": {"first_name": "Someone", "last_name": "Else", "email": "vik@example.com", "phone": "+1-555-0101"},
+        })
+        ekata = build_mock_ekata(req)
+        assert ekata["email_to_name_match"] is False
+        assert ekata["phone_to_name_match"] is False
+        assert ekata["name_similarity"] < 50
+
+        simple = enrich_ekata_service(EkataRequest.model_validate({
+            "request_id": "req_s",
+            "data": {"first_name": "Vik", "last_name": "Reddy", "email": "vik@example.com"},
+        }))
+        assert simple.ekata_payload.first_name_match is True
+        assert simple.ekata_payload.last_name_match is True
+        assert simple.ekata_payload.name_similarity == 100
+
+        # No index: pure deterministic mock, unchanged shape
+        configure_matching(None)
+        assert "name_similarity" not in build_mock_ekata(req)
+    finally:
+        configure_matching(previous)
+
+
+def test_reingest_drops_replaced_identity(tmp_path):
+    def row(txid, first, email):
+        return {"transaction": {"transaction_id": txid}, "customer": {"first_name": first, "last_name": "Reddy",
+                                                                      "email": email, "phone": "555-010-1234"}}
+
+    store = DatasetStore(str(tmp_path / "missing.json"), compact=True)
+    store.load()
+    store.ingest_many([row("tx_1", "Jose", "jose@example.com"), row("tx_2", "Jose", "other@example.com")])
+    assert store.matches.match("Jose", "Reddy", "jose@example.com")["email_to_name_match"] is True
+
+    store.ingest(row("tx_1", "Maria", "maria@example.com"))
+    assert store.matches.by_email.get("jose@example.com") is None
+    assert store.matches.match("Maria", "Reddy", "maria@example.com")["email_to_name_match"] is True
+    # tx_2 still carries Jose on the shared phone
+    assert sorted(store.matches.by_phone[normalize_phone("555-010-1234")]) == [("jose", "reddy"), ("maria", "reddy")]
@@ -0,0 +1,120 @@
+import json
+import random
+
+import pytest
+
+from app import scoring
+from app.scoring import DEFAULT_SCORING_CONFIG, ScoringEngine
+
+
+def _legacy_risk(base):
+    # The blend normalize_response hard-coded before the scoring engine
+    email_score = int(base["external_services"]["emailage"].get("score", 0))
+    tm_score = int(base["external_services"]["threatmetrix"].get("risk_score", 0))
+    blended = int(round((0.55 * tm_score) + (0.45 * email_score)))
+    codes = [
+        "IP_PROXY" if base.get("transaction", {}).get("network", {}).get("ip_proxy") else None,
+        "DISPOSABLE_EMAIL" if base["external_services"]["emailage"].get("disposable") else None,
+        "BOT_DETECTED" if base["external_services"]["threatmetrix"].get("bot_detected") else None,
+    ]
+    return {
+        "blended_score": blended,
+        "reason_codes": [x for x in codes if x],
+        "recommended_action": "REVIEW" if blended >= 60 else "ALLOW",
+    }
+
+
+def _payloads(n=3000):
+    rnd = random.Random(7)
+    out = []
+    for _ in range(n):
+        out.append({
+            "transaction": {"network": {"ip_proxy": rnd.random() < 0.2}} if rnd.random() < 0.9 else {},
+            "external_services": {
+                "emailage": {"score": rnd.randint(0, 100), "disposable": rnd.random() < 0.1},
+                "threatmetrix": {"risk_score": rnd.randint(0, 100), "bot_detected": rnd.random() < 0.1},
+            },
+        })
+    return out
+
+
+def test_default_config_file_matches_builtin():
+    with open("config/scoring.json", encoding="utf-8") as f:
+        assert json.load(f) == DEFAULT_SCORING_CONFIG
+
+
+def test_default_engine_matches_legacy_blend():
+    engine = ScoringEngine()
+    payloads = _payloads()
+    expected = [_legacy_risk(p) for p in payloads]
+    assert [engine.score(p) for p in payloads] == expected
+    assert engine.score_batch(payloads) == expected
+
+
+def test_batch_without_numpy(monkeypatch):
+    monkeypatch.setattr(scoring, "np", None)
+    payloads = _payloads(200)
+    assert ScoringEngine().score_batch(payloads) == [_legacy_risk(p) for p in payloads]
+
+
+def test_custom_rules_and_thresholds():
+    engine = ScoringEngine({
+        "inputs": [{"name": "tm", "path": "tm.score", "weight": 1.0}],
+        "thresholds": [{"min_score": 50, "action": "REVIEW"}, {"min_score": 90, "action": "DECLINE"}],
+        "reason_codes": [{"code": "HIGH_TM", "path": "tm.score", "op": ">=", "value": 80}],
+    })
+    payloads = [{"tm": {"score": s}} for s in (10, 60, 85, 95)]
+    expected = [
+        {"blended_score": 10, "reason_codes": [], "recommended_action": "ALLOW"},
+        {"blended_score": 60, "reason_codes": [], "recommended_action": "REVIEW"},
+        {"blended_score": 85, "reason_codes": ["HIGH_TM"], "recommended_action": "REVIEW"},
+        {"blended_score": 95, "reason_codes": ["HIGH_TM"], "recommended_action": "DECLINE"},
+    ]
+    assert [engine.score(p) for p in payloads] == expected
+    assert engine.score_batch(payloads) == expected
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        ScoringEngine({"inputs": [{"path": "a.b"}]})
+    with pytest.raises(ValueError):
+        ScoringEngine({"inputs": [], "reason_codes": [{"code": "X", "path": "a", "op": "~"}]})
+
+
+def test_normalize_batch_matches_single():
+    from app.enrich import normalize_batch, normalize_response
+    from app.models import EnrichRequest
+
+    reqs = [
+        EnrichRequest.model_validate({
+            "request_id": f"req_{i}",
+            "transaction_id": f"tx_batch_{i}",
+            "transaction_time": "2026-01-14T05:22:31Z",
+            "data": {"first_name": "A", "last_name": "B", "email": f"u{i}@example.com"},
+        })
+        for i in range(50)
+    ]
+    single = [normalize_response(r, None) for r in reqs]
+    batch = normalize_batch([(r, None) for r in reqs])
+    for a, b in zip(single, batch):
+        assert a["transaction_payload"]["risk"] == b["transaction_payload"]["risk"]
+        assert a["request_id"] == b["request_id"]
+
+
+def test_batch_columns_match_single_on_ragged_payloads():
+    engine = ScoringEngine({
+        "inputs": [{"path": "svc.a.score", "weight": 0.5}, {"path": "svc.b", "weight": 0.5}],
+        "thresholds": [{"min_score": 40, "action": "REVIEW"}],
+        "reason_codes": [
+            {"code": "A_FLAG", "path": "svc.a.flag"},
+            {"code": "B_HIGH", "path": "svc.b", "op": ">", "value": 50},
+        ],
+    })
+    payloads = [
+        {"svc": {"a": {"score": 90, "flag": True}, "b": 70}},
+        {"svc": {"a": "not a dict", "b": 10}},
+        {"svc": None},
+        {},
+        {"svc": {"a": {"score": None, "flag": 0}}},
+    ]
+    assert engine.score_batch(payloads) == [engine.score(p) for p in payloads]
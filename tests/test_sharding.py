@@ -0,0 +1,170 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dataset import DatasetStore
+from app.deadlines import parse_deadline
+from app.router import build_router
+from app.sharding import HashRing, parse_shard_urls
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _row(txid, email, when):
+    return {
+        "transaction": {"transaction_id": txid, "transaction_time": when},
+        "customer": {"email": email},
+        "external_services": {
+            "emailage": {"score": 10, "disposable": False},
+            "threatmetrix": {"risk_score": 10, "bot_detected": False},
+            "ekata": {"identity_confidence": 50},
+        },
+    }
+
+
+def _write_dataset(path, n=40):
+    rows = [_row(f"tx_{i}", f"user{i % 5}@example.com", f"2026-01-{1 + i % 28:02d}T00:00:00Z") for i in range(n)]
+    path.write_text(json.dumps(rows))
+    return rows
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_ring_is_stable_and_balanced():
+    ring = HashRing(["shard-0", "shard-1", "shard-2"])
+    keys = [f"tx_{i}" for i in range(3000)]
+    owners = {k: ring.node_for(k) for k in keys}
+    counts = {n: list(owners.values()).count(n) for n in ring.nodes}
+    assert all(600 < c < 1400 for c in counts.values())
+
+    # Adding a node only moves keys onto the new node
+    ring.add("shard-3")
+    moved = [k for k in keys if ring.node_for(k) != owners[k]]
+    assert all(ring.node_for(k) == "shard-3" for k in moved)
+    assert len(moved) < len(keys) / 2
+
+
+def test_parse_shard_urls():
+    assert parse_shard_urls("a=http://h:1/, b=http://h:2") == {"a": "http://h:1", "b": "http://h:2"}
+    with pytest.raises(ValueError):
+        parse_shard_urls("http://h:1")
+
+
+def test_router_rejects_spent_deadline_and_batches():
+    with TestClient(build_router({"a": "http://127.0.0.1:9"})) as router:
+        r = router.post("/v1/ekata", json={"request_id": "r"}, headers={"x-deadline-ms": "0"})
+        assert r.status_code == 504
+
+        # Batches are not routed; clients fall back to single calls on 501
+        assert router.post("/v1/enrich/batch", json=[]).status_code == 501
+
+
+def test_non_finite_deadlines_are_ignored():
+    for value in ("nan", "inf", "-inf", "soon"):
+        assert parse_deadline({"x-deadline-ms": value}) is None
+    assert parse_deadline({"x-deadline-ms": "1500"}, now=10.0) == 11.5
+
+
+def test_shard_filter_partitions_dataset(tmp_path):
+    path = tmp_path / "rows.json"
+    rows = _write_dataset(path)
+    ring = HashRing(["shard-0", "shard-1"])
+    stores = [DatasetStore(str(path), shard_filter=ring.owns(n)) for n in ring.nodes]
+    for s in stores:
+        s.load()
+    assert sum(len(s.by_txid) for s in stores) == len(rows)
+    assert not set(stores[0].by_txid) & set(stores[1].by_txid)
+
+
+@pytest.fixture
+def shard_cluster(tmp_path):
+    path = tmp_path / "rows.json"
+    _write_dataset(path)
+    names = ["shard-0", "shard-1"]
+    urls, procs = {}, []
+    for name in names:
+        port = _free_port()
+        env = dict(os.environ, DATASET_PATH=str(path), SHARDS=",".join(names), SHARD_ID=name)
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        ))
+        urls[name] = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 20
+        for url in urls.values():
+            while True:
+                try:
+                    if httpx.get(url + "/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                assert time.time() < deadline, "shard did not start"
+                time.sleep(0.1)
+        yield urls
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait(timeout=10)
+
+
+def test_router_forwards_to_owner_and_scatters_email(shard_cluster):
+    ring = HashRing(list(shard_cluster))
+    counts = [httpx.get(url + "/health").json()["dataset_count"] for url in shard_cluster.values()]
+    assert sum(counts) == 40
+
+    with TestClient(build_router(shard_cluster)) as client:
+        payload = {
+            "request_id": "req_1",
+            "transaction_id": "tx_7",
+            "transaction_time": "2026-01-14T05:22:31Z",
+            "data": {"first_name": "A", "last_name": "B", "email": "user2@example.com"},
+        }
+        r = client.post("/v1/enrich", json=payload)
+        assert r.status_code == 200
+        assert r.headers["X-Shard"] == ring.node_for("tx_7")
+        assert r.json()["transaction_payload"]["transaction"]["transaction_id"] == "tx_7"
+
+        # Unknown txid: newest user2 row across all shards is tx_27 (2026-01-28)
+        payload["transaction_id"] = "tx_missing"
+        r = client.post("/v1/enrich/emailage", json=payload)
+        assert r.json()["dataset_hit"] is True
+        assert r.headers["X-Shard"] == ring.node_for("tx_27")
+
+        # Tenants are not sharded; the header is dropped rather than sent to shards that do not know it
+        r = client.post("/v1/enrich/emailage", json=payload, headers={"X-Tenant": "acme"})
+        assert r.status_code == 200 and r.json()["dataset_hit"] is True
+
+        payload["data"]["email"] = "nobody@example.com"
+        assert client.post("/v1/enrich", json=payload).json()["dataset_hit"] is False
+
+        payload["data"]["email"] = "not-an-email"
+        assert client.post("/v1/enrich", json=payload).status_code == 422
+
+
+def test_router_email_fallback_skips_failed_shards(shard_cluster):
+    # The dead shard is on the router's ring but refuses connections
+    urls = dict(shard_cluster, dead="http://127.0.0.1:9")
+    ring = HashRing(list(urls))
+    txid = next(f"tx_missing_{i}" for i in range(100) if ring.node_for(f"tx_missing_{i}") != "dead")
+    payload = {
+        "request_id": "req_2",
+        "transaction_id": txid,
+        "transaction_time": "2026-01-14T05:22:31Z",
+        "data": {"first_name": "A", "last_name": "B", "email": "user2@example.com"},
+    }
+    with TestClient(build_router(urls)) as client:
+        r = client.post("/v1/enrich", json=payload, headers={"x-deadline-ms": "5000"})
+        assert r.status_code == 200
+        assert r.json()["dataset_hit"] is True
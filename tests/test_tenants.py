@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.dataset import DatasetStore
+from app.tenants import TenantOverBudget, TenantRegistry, parse_tenants
+
+
+def _write(path, prefix, n):
+    rows = [
+        {
+            "transaction": {"transaction_id": f"{prefix}_{i}", "transaction_time": "2026-01-01T00:00:00Z"},
+            "customer": {"first_name": "Ann", "last_name": prefix, "email": f"{prefix}{i}@example.com"},
+        }
+        for i in range(n)
+    ]
+    path.write_text(json.dumps(rows))
+    return str(path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {name: _write(tmp_path / f"{name}.json", name, n) for name, n in (("a", 50), ("b", 50), ("c", 500))}
+
+
+def test_parse_tenants():
+    assert parse_tenants("a=x.json, b=y.json") == {"a": "x.json", "b": "y.json"}
+    with pytest.raises(ValueError):
+        parse_tenants("x.json")
+
+
+def test_lazy_load_and_lru_eviction(paths):
+    one = DatasetStore(paths["a"])
+    one.load()
+    budget = int(one.estimate_bytes() * 2.5)
+
+    registry = TenantRegistry(paths, lambda name, p: DatasetStore(p), total_budget_bytes=budget)
+    assert registry.metrics()["a"]["loaded"] is False
+
+    assert len(registry.get("a").by_txid) == 50
+    registry.get("b")
+    registry.get("a")  # a becomes most recently used
+    assert registry.metrics()["b"]["loaded"] is True
+
+    registry.get("c")
+    metrics = registry.metrics()
+    # Loading c exceeds the budget: b (least recently used) goes first, then a
+    assert metrics["c"]["loaded"] is True
+    assert metrics["b"]["loaded"] is False and metrics["b"]["evictions"] == 1
+    assert metrics["a"]["loaded"] is False and metrics["a"]["requests"] == 2
+    assert metrics["c"]["estimated_bytes"] > 0
+
+
+def test_tenant_over_budget(paths):
+    registry = TenantRegistry({"c": paths["c"]}, lambda name, p: DatasetStore(p), tenant_budget_bytes=1000)
+    for _ in range(2):
+        with pytest.raises(TenantOverBudget):
+            registry.get("c")
+    assert registry.metrics()["c"]["over_budget"] is True
+    assert registry.metrics()["c"]["loads"] == 0
+
+
+def test_oversized_file_refused_without_loading_until_it_changes(paths, tmp_path):
+    small = DatasetStore(_write(tmp_path / "small.json", "s", 5))
+    small.load()
+    budget = small.estimate_bytes() * 3
+    loaded = []
+
+    def factory(name, path):
+        loaded.append(name)
+        return DatasetStore(path)
+
+    registry = TenantRegistry({"c": paths["c"]}, factory, tenant_budget_bytes=budget)
+    with pytest.raises(TenantOverBudget):
+        registry.get("c")
+    assert loaded == []
+
+    _write(tmp_path / "c.json", "c", 5)
+    assert len(registry.get("c").by_txid) == 5
+    assert registry.metrics()["c"]["over_budget"] is False
+
+
+def test_tenant_selection_by_header_and_path(paths, monkeypatch):
+    registry = TenantRegistry({"a": paths["a"], "b": paths["b"]}, main._tenant_store)
+    monkeypatch.setattr(main, "tenants", registry)
+    client = TestClient(main.app)
+    payload = {
+        "request_id": "req_t",
+        "transaction_id": "a_3",
+        "transaction_time": "2026-01-14T05:22:31Z",
+        "data": {"first_name": "Ann", "last_name": "a", "email": "a3@example.com"},
+    }
+
+    assert client.post("/v1/enrich", json=payload, headers={"X-Tenant": "a"}).json()["dataset_hit"] is True
+    assert client.post("/v1/enrich", json=payload, headers={"X-Tenant": "b"}).json()["dataset_hit"] is False
+    assert client.post("/t/a/v1/enrich/emailage", json=payload).status_code == 200
+    assert client.post("/v1/enrich", json=payload).json()["dataset_hit"] is False
+    assert client.post("/v1/enrich", json=payload, headers={"X-Tenant": "zzz"}).status_code == 404
+
+    tenants = client.get("/health").json()["tenants"]
+    assert tenants["a"]["requests"] == 2
+    assert tenants["a"]["dataset_hits"] == 2
+    assert tenants["b"]["dataset_hits"] == 0
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from app.dataset import DatasetStore
+from app.enrich import (
+    clock_mode,
+    configure_clock,
+    configure_mock_cache,
+    mock_cache_stats,
+    normalize_response,
+)
+from app.models import EnrichRequest
+from app.warmup import warm_up
+
+BODY = {
+    "request_id": "req_w",
+    "transaction_id": "tx_warm",
+    "transaction_time": "2026-01-14T05:22:31Z",
+    "data": {"first_name": "W", "last_name": "U", "email": "warm@example.com"},
+}
+
+
+@pytest.fixture
+def capture(tmp_path):
+    path = tmp_path / "capture.ndjson"
+    lines = [
+        json.dumps(BODY),
+        json.dumps({"path": "/v1/enrich/threatmetrix", "body": dict(BODY, transaction_id="tx_warm2")}),
+        json.dumps({"path": "/v1/ekata", "body": {"request_id": "r", "data": BODY["data"]}}),
+        json.dumps({"request_id": "missing_fields"}),
+        "",
+    ]
+    path.write_text("\n".join(lines))
+    previous = clock_mode()
+    configure_clock("transaction")
+    configure_mock_cache(1000)
+    yield str(path)
+    configure_mock_cache(0)
+    configure_clock(previous)
+
+
+def test_warm_up_fills_mock_cache(capture):
+    store = DatasetStore("data/sample_transactions.json")
+    store.load()
+    report = warm_up(store, capture, budget_seconds=10)
+    assert report["replayed"] == 3
+    assert report["cached"] == 4
+    assert report["errors"] == 1
+    assert report["budget_exhausted"] is False
+    assert report["mock_cache"]["size"] == 4
+
+    hits = mock_cache_stats()["hits"]
+    normalize_response(EnrichRequest.model_validate(BODY), None)
+    assert mock_cache_stats()["hits"] == hits + 3
+
+
+def test_warm_up_respects_budget_and_limit(capture):
+    store = DatasetStore("data/sample_transactions.json")
+    assert warm_up(store, capture, budget_seconds=0)["budget_exhausted"] is True
+    assert warm_up(store, capture, budget_seconds=10, max_entries=1)["replayed"] == 1
+
+
+def test_cached_mocks_match_uncached(capture):
+    req = EnrichRequest.model_validate(BODY)
+    cached = normalize_response(req, None)
+    configure_mock_cache(0)
+    assert normalize_response(req, None) == cached
+
+
+def test_warm_up_without_cache_reports_nothing_cached(capture):
+    configure_mock_cache(0)
+    report = warm_up(DatasetStore("data/sample_transactions.json"), capture, budget_seconds=10)
+    assert report["replayed"] == 3
+    assert report["cached"] == 0